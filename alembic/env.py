@@ -2,9 +2,8 @@ from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
-from api.core.settings import settings
 import api.models.model  # noqa: F401
-from api.database.database import Base
+from api.database.database import Base, DATABASE_URL
 from alembic import context
 
 # this is the Alembic Config object, which provides
@@ -13,7 +12,8 @@ config = context.config
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
-config.set_main_option('sqlalchemy.url', settings.DATABASE_URL)
+# Always migrate through the sync driver, even if DATABASE_URL names an async one
+config.set_main_option('sqlalchemy.url', DATABASE_URL)
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
@@ -23,6 +23,11 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Leave the todos_fts index and its shadow tables, created by raw SQL, out of autogenerate."""
+    return not (type_ == "table" and name.startswith("todos_fts"))
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -45,6 +50,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -68,7 +74,8 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            include_object=include_object
         )
 
         with context.begin_transaction():
@@ -0,0 +1,30 @@
+"""add todo composite indexes
+
+Revision ID: 5b1e9c3d7a42
+Revises: 70fb52f11e32
+Create Date: 2026-10-17 09:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1e9c3d7a42'
+down_revision: Union[str, Sequence[str], None] = '70fb52f11e32'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_todos_user_id_completed_due_date', 'todos', ['user_id', 'completed', 'due_date'], unique=False)
+    op.create_index('ix_todos_user_id_created_at', 'todos', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_todos_user_id_created_at', table_name='todos')
+    op.drop_index('ix_todos_user_id_completed_due_date', table_name='todos')
@@ -0,0 +1,63 @@
+"""add todo search index
+
+Revision ID: 9d3b6a1f4e28
+Revises: f41c8d2a6e07
+Create Date: 2026-10-17 17:05:42.781305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3b6a1f4e28'
+down_revision: Union[str, Sequence[str], None] = 'f41c8d2a6e07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'sqlite':
+        # FTS5 is SQLite only; other backends fall back to a LIKE scan (see api.services.search_service)
+        return
+    # External-content index: the text lives in todos, keyed by its rowid.
+    # user_id is indexed too, so a search is scoped to one user inside the index.
+    # todos has a string primary key, so its rowid is implicit and VACUUM may
+    # renumber it: run INSERT INTO todos_fts (todos_fts) VALUES ('rebuild')
+    # after a VACUUM.
+    op.execute(
+        "CREATE VIRTUAL TABLE todos_fts USING fts5("
+        "title, content, user_id, content='todos', content_rowid='rowid')"
+    )
+    op.execute(
+        "CREATE TRIGGER todos_fts_insert AFTER INSERT ON todos BEGIN "
+        "INSERT INTO todos_fts (rowid, title, content, user_id) VALUES (new.rowid, new.title, new.content, new.user_id); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER todos_fts_delete AFTER DELETE ON todos BEGIN "
+        "INSERT INTO todos_fts (todos_fts, rowid, title, content, user_id) "
+        "VALUES ('delete', old.rowid, old.title, old.content, old.user_id); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER todos_fts_update AFTER UPDATE OF title, content, user_id ON todos BEGIN "
+        "INSERT INTO todos_fts (todos_fts, rowid, title, content, user_id) "
+        "VALUES ('delete', old.rowid, old.title, old.content, old.user_id); "
+        "INSERT INTO todos_fts (rowid, title, content, user_id) VALUES (new.rowid, new.title, new.content, new.user_id); "
+        "END"
+    )
+    op.execute("INSERT INTO todos_fts (todos_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute("DROP TRIGGER IF EXISTS todos_fts_update")
+    op.execute("DROP TRIGGER IF EXISTS todos_fts_delete")
+    op.execute("DROP TRIGGER IF EXISTS todos_fts_insert")
+    op.execute("DROP TABLE IF EXISTS todos_fts")
@@ -0,0 +1,38 @@
+"""add todo embeddings
+
+Revision ID: b8e2c4f7d103
+Revises: 9d3b6a1f4e28
+Create Date: 2026-10-17 18:21:09.514732
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e2c4f7d103'
+down_revision: Union[str, Sequence[str], None] = '9d3b6a1f4e28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing todos are embedded on their owner's first similarity query
+    op.create_table('todo_embeddings',
+    sa.Column('todo_id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('model', sa.String(), nullable=False),
+    sa.Column('vector', sa.LargeBinary(), nullable=False),
+    sa.ForeignKeyConstraint(['todo_id'], ['todos.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('todo_id')
+    )
+    op.create_index(op.f('ix_todo_embeddings_user_id'), 'todo_embeddings', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_todo_embeddings_user_id'), table_name='todo_embeddings')
+    op.drop_table('todo_embeddings')
@@ -0,0 +1,30 @@
+"""add keyset pagination indexes
+
+Revision ID: c2d84f6e1b90
+Revises: 5b1e9c3d7a42
+Create Date: 2026-10-17 10:03:48.771254
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2d84f6e1b90'
+down_revision: Union[str, Sequence[str], None] = '5b1e9c3d7a42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_todos_created_at_id', 'todos', ['created_at', 'id'], unique=False)
+    op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_created_at_id', table_name='users')
+    op.drop_index('ix_todos_created_at_id', table_name='todos')
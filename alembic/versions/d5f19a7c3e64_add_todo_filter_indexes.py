@@ -0,0 +1,32 @@
+"""add todo filter indexes
+
+Revision ID: d5f19a7c3e64
+Revises: b8e2c4f7d103
+Create Date: 2026-10-17 19:02:47.120934
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5f19a7c3e64'
+down_revision: Union[str, Sequence[str], None] = 'b8e2c4f7d103'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_todos_completed_due_date', 'todos', ['completed', 'due_date'], unique=False)
+    op.create_index('ix_todos_priority_due_date', 'todos', ['priority', 'due_date'], unique=False)
+    op.create_index('ix_todos_due_date', 'todos', ['due_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_todos_due_date', table_name='todos')
+    op.drop_index('ix_todos_priority_due_date', table_name='todos')
+    op.drop_index('ix_todos_completed_due_date', table_name='todos')
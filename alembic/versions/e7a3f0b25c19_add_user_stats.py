@@ -0,0 +1,46 @@
+"""add user stats
+
+Revision ID: e7a3f0b25c19
+Revises: c2d84f6e1b90
+Create Date: 2026-10-17 11:26:05.318842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a3f0b25c19'
+down_revision: Union[str, Sequence[str], None] = 'c2d84f6e1b90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_stats',
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('priority', sa.Integer(), nullable=False),
+    sa.Column('completed', sa.Boolean(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('todo_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'priority', 'completed', 'day')
+    )
+    # Backfill the counters from existing todos (see api.services.stats_service)
+    op.execute(
+        "INSERT INTO user_stats (user_id, priority, completed, day, todo_count) "
+        "SELECT user_id, priority, completed, day, COUNT(*) FROM ("
+        "  SELECT user_id, COALESCE(priority, 0) AS priority, COALESCE(completed, false) AS completed, "
+        "  CASE WHEN COALESCE(completed, false) THEN date(updated_at) "
+        "  ELSE COALESCE(date(due_date), '9999-12-31') END AS day "
+        "  FROM todos"
+        ") AS buckets GROUP BY user_id, priority, completed, day"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_stats')
@@ -1,3 +1,4 @@
+from typing import List, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -5,6 +6,85 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     OPENAI_API_KEY: str
+    OPENAI_BASE_URL: Optional[str] = None
+
+    # Database for read-only endpoints, e.g. a replica. Unset, SQLite files are
+    # opened a second time read-only and other databases use DATABASE_URL
+    DATABASE_READ_URL: Optional[str] = None
+
+    # Connection pool; pre-ping and recycle only apply to database servers
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800
+
+    # PRAGMAs set on each SQLite connection; None leaves SQLite's default
+    SQLITE_JOURNAL_MODE: Optional[str] = "wal"
+    SQLITE_SYNCHRONOUS: Optional[str] = "normal"
+    SQLITE_BUSY_TIMEOUT_MS: Optional[int] = 5000
+    SQLITE_CACHE_SIZE: Optional[int] = -65536
+    SQLITE_MMAP_SIZE: Optional[int] = 268435456
+
+    # LLM gateway: per-call deadline, concurrency cap and circuit breaker
+    LLM_TIMEOUT: float = 10.0
+    LLM_MAX_CONCURRENCY: int = 16
+    LLM_BREAKER_ERROR_RATE: float = 0.5
+    LLM_BREAKER_MIN_CALLS: int = 10
+    LLM_BREAKER_WINDOW: int = 20
+    LLM_BREAKER_COOLDOWN: float = 30.0
+
+    # Micro-batching of description expansions; LLM_BATCH_MAX_SIZE=1 disables it
+    LLM_BATCH_WINDOW_MS: float = 20.0
+    LLM_BATCH_MAX_SIZE: int = 16
+
+    # Local spaCy pipeline, loaded on first use unless NLP_PRELOAD is set
+    NLP_ENABLED: bool = True
+    NLP_MODEL: str = "en_core_web_sm"
+    NLP_PRELOAD: bool = False
+
+    # Background /todos/nlp/ jobs; one still running after the lease is taken over
+    NLP_JOB_WORKERS: int = 4
+    NLP_JOB_MAX_ATTEMPTS: int = 3
+    NLP_JOB_LEASE_SECONDS: int = 300
+
+    # Authenticated-user and verified-token caches
+    AUTH_CACHE_TTL: int = 60
+    AUTH_CACHE_SIZE: int = 10000
+
+    # bcrypt hashing: cost factor, worker processes (0 = thread pool) and queue limit
+    PASSWORD_HASH_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: Optional[int] = None
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
+    # Todo similarity: per-user vector index cache and the duplicate warning threshold
+    SIMILARITY_CACHE_TTL: int = 300
+    SIMILARITY_CACHE_SIZE: int = 1000
+    DUPLICATE_THRESHOLD: float = 0.85
+
+    # Todo change feed: longest long-poll wait and SSE heartbeat interval, in seconds
+    CHANGE_FEED_MAX_WAIT: int = 30
+    CHANGE_FEED_HEARTBEAT: int = 15
+
+    # Request metrics middleware and the /metrics endpoint
+    METRICS_ENABLED: bool = True
+
+    # Opt-in profiler: captures requests slower than PROFILING_SLOW_MS and a
+    # PROFILING_SAMPLE_RATE fraction of the others, keeping the last MAX_CAPTURES
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_SLOW_MS: float = 1000.0
+    PROFILING_MAX_CAPTURES: int = 50
+    PROFILING_INTERVAL_MS: float = 5.0
+
+    # Usernames allowed to use the /admin endpoints
+    ADMIN_USERNAMES: List[str] = []
+
+    # AI suggestion cache: "memory", "sqlite" or "none"
+    SUGGESTION_CACHE_BACKEND: str = "memory"
+    SUGGESTION_CACHE_PATH: str = "./db/suggestion_cache.db"
+    SUGGESTION_CACHE_TTL: int = 3600
+    SUGGESTION_CACHE_SIZE: int = 1024
 
     class Config:
         env_file = ".env"
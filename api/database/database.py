@@ -1,21 +1,168 @@
-from sqlalchemy import create_engine
+from typing import Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 from api.core.settings import settings
 
-DATABASE_URL = settings.DATABASE_URL
+# Async DBAPI driver used by the API for each backend. Alembic and scripts keep
+# using the sync driver, so DATABASE_URL may name either one.
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+    "mysql": "aiomysql",
+}
 
-engine = create_engine(DATABASE_URL, echo=False)
+def to_sync_url(url: str) -> URL:
+    """Return the sync-driver form of a database URL."""
+    url = make_url(url)
+    if url.get_driver_name() == ASYNC_DRIVERS.get(url.get_backend_name()):
+        return url.set(drivername=url.get_backend_name())
+    return url
+
+def to_async_url(url: str) -> URL:
+    """Return the async-driver form of a database URL."""
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None or url.get_driver_name() == driver:
+        return url
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}")
+
+def is_memory_sqlite(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and (url.database in (None, "", ":memory:") or url.query.get("mode") == "memory")
+
+def to_read_only_url(url: str) -> Optional[URL]:
+    """Return a URL opening a SQLite file read-only (a `mode=ro` URI), or None for other databases."""
+    url = make_url(url)
+    if url.get_backend_name() != "sqlite" or is_memory_sqlite(url):
+        return None
+    if url.query.get("uri") != "true":
+        url = url.set(database=f"file:{url.database}").update_query_dict({"uri": "true"})
+    return url.update_query_dict({"mode": "ro"})
+
+def engine_options(url) -> dict:
+    """
+    Connection pool arguments for an engine on `url`, from Settings.
+
+    In-memory SQLite keeps SQLAlchemy's single-connection pool. Pre-ping and
+    recycling guard against connections a database server dropped, so they
+    are left off for SQLite files, where they would only add a query per checkout.
+    """
+    url = make_url(url)
+    if is_memory_sqlite(url):
+        return {}
+    options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    }
+    if url.get_backend_name() != "sqlite":
+        options.update(pool_pre_ping=settings.DB_POOL_PRE_PING, pool_recycle=settings.DB_POOL_RECYCLE)
+    return options
+
+def sqlite_pragmas(read_only: bool = False) -> dict:
+    """
+    PRAGMAs applied to every new SQLite connection, from Settings.
+
+    Read-only connections skip journal_mode and synchronous: they cannot
+    change the journal mode, which is stored in the file by the writers, and
+    they never commit.
+    """
+    pragmas = {
+        "journal_mode": settings.SQLITE_JOURNAL_MODE,
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+        "cache_size": settings.SQLITE_CACHE_SIZE,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+    }
+    if read_only:
+        del pragmas["journal_mode"], pragmas["synchronous"]
+    return {name: value for name, value in pragmas.items() if value is not None}
+
+def apply_sqlite_pragmas(engine: Engine, read_only: bool = False) -> None:
+    """
+    Set `sqlite_pragmas` on each connection the engine opens.
+
+    WAL lets readers run alongside the single writer, and with
+    synchronous=NORMAL a commit appends to the WAL without an fsync (the WAL
+    is synced at checkpoints; a power loss can drop the last commits but not
+    corrupt the database). busy_timeout makes a writer wait for the lock
+    instead of failing with "database is locked".
+    """
+    if engine.dialect.name != "sqlite" or is_memory_sqlite(engine.url):
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in sqlite_pragmas(read_only).items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+def create_db_engine(url) -> Engine:
+    """Create a sync engine with the configured pool and SQLite pragmas."""
+    engine = create_engine(url, echo=False, **engine_options(url))
+    apply_sqlite_pragmas(engine)
+    return engine
+
+def create_async_db_engine(url, read_only: bool = False) -> AsyncEngine:
+    """
+    Create an async engine with the configured pool and SQLite pragmas.
+
+    A `read_only` engine runs in autocommit mode, so reads skip the
+    BEGIN/ROLLBACK round trips of a transaction. It does not make the
+    connections read-only by itself: pass a read-only URL for that.
+    """
+    options = engine_options(url)
+    if read_only:
+        options["isolation_level"] = "AUTOCOMMIT"
+    engine = create_async_engine(url, echo=False, **options)
+    apply_sqlite_pragmas(engine.sync_engine, read_only)
+    return engine
+
+DATABASE_URL = to_sync_url(settings.DATABASE_URL).render_as_string(hide_password=False)
+ASYNC_DATABASE_URL = to_async_url(settings.DATABASE_URL).render_as_string(hide_password=False)
+
+# Sync engine, used by Alembic and offline scripts
+engine = create_db_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(
     bind=engine,
     autocommit=False,
     autoflush=False
 )
+
+# Async engine, used by the API
+async_engine = create_async_db_engine(ASYNC_DATABASE_URL)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+# Read-only engine, used by the API's GET endpoints: DATABASE_READ_URL (e.g. a
+# replica), else the SQLite file opened read-only, else the primary engine
+READ_DATABASE_URL = to_async_url(settings.DATABASE_READ_URL) if settings.DATABASE_READ_URL else to_read_only_url(ASYNC_DATABASE_URL)
+if READ_DATABASE_URL is not None:
+    read_engine = create_async_db_engine(READ_DATABASE_URL.render_as_string(hide_password=False), read_only=True)
+else:
+    read_engine = async_engine
+
+ReadSessionLocal = async_sessionmaker(
+    bind=read_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
 Base = declarative_base()
 
-def init_db():
-    db = SessionLocal()
-    try:
+async def init_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Dependency for endpoints that only read; writing through this session fails
+async def init_read_db():
+    async with ReadSessionLocal() as db:
         yield db
-    finally:
-        db.close()
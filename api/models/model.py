@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, ForeignKey, DateTime, Boolean, Integer
+from sqlalchemy import Column, String, Text, ForeignKey, Date, DateTime, Boolean, Integer, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy import func
 from datetime import datetime, timezone
@@ -9,8 +9,15 @@ from api.database.database import Base
 class BaseModel(Base):
     __abstract__ = True
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    created_at = Column(DateTime, default=datetime.now(timezone.utc))
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    # Set from Python as well: SQLite's now() has one-second resolution, and
+    # ETags and If-Match need every write to change updated_at
+    updated_at = Column(
+        DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+        onupdate=lambda: datetime.now(timezone.utc)
+    )
 
 class User(BaseModel):
     __tablename__ = 'users'
@@ -21,6 +28,11 @@ class User(BaseModel):
 
     todos = relationship("Todo", back_populates="user")
 
+    __table_args__ = (
+        # Keyset pagination order
+        Index('ix_users_created_at_id', 'created_at', 'id'),
+    )
+
 class Todo(BaseModel):
     __tablename__ = 'todos'
     title = Column(String)
@@ -32,3 +44,78 @@ class Todo(BaseModel):
 
     user = relationship("User", back_populates="todos")
 
+    __table_args__ = (
+        # Per-user status/overdue filters (analyze_productivity)
+        Index('ix_todos_user_id_completed_due_date', 'user_id', 'completed', 'due_date'),
+        # Per-user listings in creation order
+        Index('ix_todos_user_id_created_at', 'user_id', 'created_at'),
+        # Keyset pagination order
+        Index('ix_todos_created_at_id', 'created_at', 'id'),
+        # GET /todos/ filters and sorts across users
+        Index('ix_todos_completed_due_date', 'completed', 'due_date'),
+        Index('ix_todos_priority_due_date', 'priority', 'due_date'),
+        Index('ix_todos_due_date', 'due_date'),
+    )
+
+class Job(BaseModel):
+    """Durable background job, processed by the in-process job queue."""
+    __tablename__ = 'jobs'
+    kind = Column(String, nullable=False)
+    status = Column(String, nullable=False, default='pending', index=True)
+    user_id = Column(String(36), ForeignKey('users.id'), nullable=False)
+    todo_id = Column(String(36), ForeignKey('todos.id'), nullable=False)
+    payload = Column(Text, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+
+class UserStats(Base):
+    """
+    Materialized todo counters, maintained by the todo write paths.
+
+    Every todo falls in exactly one (user_id, priority, completed, day) bucket:
+    `day` is the due date of a pending todo and the completion date of a
+    completed one. Productivity reports sum a user's buckets instead of
+    scanning their todos. `priority` is 0 and `day` is `date.max` when unset,
+    since primary key columns cannot be NULL.
+    """
+    __tablename__ = 'user_stats'
+    user_id = Column(String(36), ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    priority = Column(Integer, primary_key=True)
+    completed = Column(Boolean, primary_key=True)
+    day = Column(Date, primary_key=True)
+    todo_count = Column(Integer, nullable=False, default=0)
+
+class TodoEmbedding(Base):
+    """
+    Embedding of a todo's title and content, for similarity search.
+
+    `vector` holds packed float32 values; `model` names the embedder that
+    produced it, so vectors from another embedder are recomputed instead of
+    being compared.
+    """
+    __tablename__ = 'todo_embeddings'
+    todo_id = Column(String(36), ForeignKey('todos.id', ondelete='CASCADE'), primary_key=True)
+    user_id = Column(String(36), nullable=False, index=True)
+    model = Column(String, nullable=False)
+    vector = Column(LargeBinary, nullable=False)
+
+class TodoChange(Base):
+    """
+    Append-only log of todo writes, read by the change feed.
+
+    `seq` only ever grows (AUTOINCREMENT on SQLite, so numbers of deleted
+    entries are not reused): a client that has applied a user's changes up to
+    `seq` asks for the entries after it. Entries outlive the todos they name.
+    """
+    __tablename__ = 'todo_changes'
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(String(36), ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    todo_id = Column(String(36), nullable=False)
+    op = Column(String, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        # A user's changes after a sequence number
+        Index('ix_todo_changes_user_id_seq', 'user_id', 'seq'),
+        {'sqlite_autoincrement': True},
+    )
@@ -0,0 +1,90 @@
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Response
+from api.models.model import User
+from api.schemas.profile import ProfileDetail, ProfileSummary
+from api.utils.dependencies import get_admin_user
+from api.utils.profiling import Capture, profiler, to_collapsed, to_pstats
+
+
+router = APIRouter(prefix="/admin/profiles", tags=["Admin"])
+
+def summarize(capture: Capture) -> dict:
+    return {
+        "id": capture.id,
+        "method": capture.method,
+        "path": capture.path,
+        "status": capture.status,
+        "duration_ms": capture.duration_ms,
+        "reason": capture.reason,
+        "captured_at": capture.captured_at,
+        "sample_count": len(capture.samples),
+        "statement_count": len(capture.statements),
+    }
+
+def find_capture(capture_id: str) -> Capture:
+    capture = profiler.get(capture_id)
+    if capture is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return capture
+
+@router.get("/", response_model=list[ProfileSummary])
+async def list_profiles_endpoint(admin: User = Depends(get_admin_user)):
+    """
+    List the captured request profiles, newest first.
+
+    Args:
+        admin (User): The authenticated admin.
+
+    Returns:
+        list[ProfileSummary]: The captures still in the ring buffer.
+    """
+    return [summarize(capture) for capture in reversed(profiler.captures)]
+
+@router.get("/{capture_id}", response_model=ProfileDetail)
+async def read_profile_endpoint(capture_id: str, admin: User = Depends(get_admin_user)):
+    """
+    Retrieve a captured profile with the SQL statements its request ran.
+
+    Args:
+        capture_id (str): The ID of the capture.
+        admin (User): The authenticated admin.
+
+    Returns:
+        ProfileDetail: The capture.
+
+    Raises:
+        HTTPException: If the capture is not (or no longer) in the ring buffer.
+    """
+    capture = find_capture(capture_id)
+    return {**summarize(capture), "statements": capture.statements}
+
+@router.get("/{capture_id}/download")
+async def download_profile_endpoint(capture_id: str, format: Literal["pstats", "collapsed"] = "collapsed", admin: User = Depends(get_admin_user)):
+    """
+    Download a captured profile's stack samples.
+
+    `collapsed` is the folded-stack text read by flamegraph.pl and
+    speedscope; `pstats` opens with `python -m pstats` or snakeviz, with
+    sample counts in place of call counts.
+
+    Args:
+        capture_id (str): The ID of the capture.
+        format (str): "collapsed" (default) or "pstats".
+        admin (User): The authenticated admin.
+
+    Returns:
+        Response: The profile file.
+
+    Raises:
+        HTTPException: If the capture is not (or no longer) in the ring buffer.
+    """
+    capture = find_capture(capture_id)
+    if format == "pstats":
+        content, media_type, extension = to_pstats(capture.samples), "application/octet-stream", "prof"
+    else:
+        content, media_type, extension = to_collapsed(capture.samples), "text/plain", "folded"
+    return Response(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="profile-{capture.id}.{extension}"'},
+    )
@@ -1,40 +1,182 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from typing import List, Literal, Optional, Union
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from api.core.settings import settings
 from api.models.model import User
-from api.utils.dependencies import get_current_user
-from sqlalchemy.orm import Session
-from api.database.database import init_db
-from api.schemas.todo import TodoCreate, TodoResponse, TodoUpdate
-from api.services.todo_service import create_todo, expand_description, generate_title_from_description, get_todo, get_todos, update_todo, delete_todo, analyze_productivity
-import spacy
+from api.utils.dependencies import get_current_user, get_optional_user
+from api.utils.etags import collection_etag, entity_etag, etag_matches, not_modified
+from api.utils.pagination import set_next_cursor
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.database.database import init_db, init_read_db
+from api.schemas.todo import JobResponse, TodoBatchRequest, TodoBatchResponse, TodoChangeResponse, TodoCreate, TodoResponse, TodoSearchResult, TodoSimilarResult, TodoUpdate
+from api.services.change_service import stream_changes, wait_for_changes
+from api.services.embedding_service import DUPLICATES_HEADER, find_duplicates, similar_todos
+from api.services.search_service import search_todos
+from api.services.job_service import create_expand_job, get_job, nlp_job_queue
+from api.services.todo_service import apply_todo_batch, create_todo, expand_description, export_todos, generate_title_from_description, get_todo, get_todo_with_version, get_todos, update_todo, delete_todo, analyze_productivity
 
 
-# Load the SpaCy model
-nlp = spacy.load("en_core_web_sm")
 router = APIRouter(prefix="/todos", tags=["Todos"])
 
 @router.post("/", response_model=TodoResponse)
-def create_todo_endpoint(todo: TodoCreate, db: Session = Depends(init_db), current_user: User = Depends(get_current_user)):
+async def create_todo_endpoint(todo: TodoCreate, response: Response, check_duplicates: bool = False, db: AsyncSession = Depends(init_db), current_user: User = Depends(get_current_user)):
     """
     Create a new todo item.
 
+    With `check_duplicates=true`, the IDs of the user's existing todos that
+    look like near-duplicates of the new one are listed, comma-separated, in
+    the `X-Possible-Duplicates` response header. The todo is created either way.
+
     Args:
         todo (TodoCreate): The todo data to create.
-        db (Session): The database session.
+        response (Response): The outgoing response, used to set the duplicates header.
+        check_duplicates (bool): Look for near-duplicates of the new todo.
+        db (AsyncSession): The database session.
         current_user (User): The authenticated user.
 
     Returns:
         TodoResponse: The created todo item.
     """
-    return create_todo(db, todo, str(current_user.id))
+    db_todo = await create_todo(db, todo, str(current_user.id))
+    if check_duplicates:
+        duplicates = await find_duplicates(db, db_todo)
+        if duplicates:
+            response.headers[DUPLICATES_HEADER] = ",".join(str(match["todo"].id) for match in duplicates)
+    return db_todo
+
+@router.post("/batch", response_model=TodoBatchResponse)
+async def batch_todos_endpoint(batch: TodoBatchRequest, db: AsyncSession = Depends(init_db), current_user: User = Depends(get_current_user)):
+    """
+    Apply a list of todo creates, updates and deletes in one transaction.
+
+    Each result carries an HTTP-style status: 201 for a created todo, 200
+    for an applied update or delete, and 404 for a todo that does not exist
+    or belongs to another user. A 404 does not fail the rest of the batch.
+
+    Args:
+        batch (TodoBatchRequest): The operations to apply, in order.
+        db (AsyncSession): The database session.
+        current_user (User): The authenticated user.
+
+    Returns:
+        TodoBatchResponse: One result per operation, in order.
+    """
+    return {"results": await apply_todo_batch(db, batch.operations, str(current_user.id))}
+
+# Media type of each export format
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+@router.get("/export")
+async def export_todos_endpoint(format: Literal["ndjson", "csv"] = "ndjson", current_user: User = Depends(get_current_user)):
+    """
+    Stream all of the authenticated user's todos as NDJSON or CSV.
+
+    Rows are written as they are read from the database, so the first bytes
+    arrive right away and memory use does not grow with the number of todos.
+
+    Args:
+        format (str): "ndjson" (default) or "csv".
+        current_user (User): The authenticated user.
+
+    Returns:
+        StreamingResponse: The exported todos, in creation order.
+    """
+    return StreamingResponse(
+        export_todos(str(current_user.id), format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="todos.{format}"'},
+    )
+
+@router.get("/changes", response_model=list[TodoChangeResponse])
+async def read_changes_endpoint(
+    since: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    wait: float = Query(0, ge=0, le=settings.CHANGE_FEED_MAX_WAIT),
+    db: AsyncSession = Depends(init_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    List the changes to the authenticated user's todos after a sequence number.
+
+    Clients keep the `seq` of the last change they applied and pass it back as
+    `since`, instead of downloading the whole collection again. With `wait`,
+    the request is held open until a change arrives or `wait` seconds pass
+    (long-polling), in which case an empty list is returned.
+
+    Args:
+        since (int): The `seq` of the last change already applied, 0 for all.
+        limit (int): The maximum number of changes to return.
+        wait (float): Seconds to wait for a change when there is none yet.
+        db (AsyncSession): The database session.
+        current_user (User): The authenticated user.
+
+    Returns:
+        list[TodoChangeResponse]: The changes, oldest first.
+    """
+    return await wait_for_changes(db, str(current_user.id), since, limit, wait)
+
+@router.get("/changes/stream")
+async def stream_changes_endpoint(since: int = Query(0, ge=0), last_event_id: Optional[int] = Header(None), current_user: User = Depends(get_current_user)):
+    """
+    Stream changes to the authenticated user's todos as Server-Sent Events.
+
+    Each event's `id` is the change's `seq` and its `data` is the change as
+    returned by `GET /todos/changes`. A reconnecting EventSource sends the
+    last id it saw in `Last-Event-ID`, which takes precedence over `since`.
+
+    Args:
+        since (int): The `seq` of the last change already applied, 0 for all.
+        last_event_id (Optional[int]): The `Last-Event-ID` header.
+        current_user (User): The authenticated user.
+
+    Returns:
+        StreamingResponse: The event stream.
+    """
+    return StreamingResponse(
+        stream_changes(str(current_user.id), last_event_id if last_event_id is not None else since),
+        media_type="text/event-stream",
+        # Keep proxies such as nginx from buffering the events
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/search", response_model=list[TodoSearchResult])
+async def search_todos_endpoint(q: str = Query(..., min_length=1), limit: int = Query(20, ge=1, le=100), db: AsyncSession = Depends(init_read_db), current_user: User = Depends(get_current_user)):
+    """
+    Search the authenticated user's todos by title and content.
+
+    Every word of `q` must match. Results are ranked by BM25, title matches
+    first, with the matched words wrapped in `<mark>` in `highlighted_title`
+    and `snippet`.
+
+    Args:
+        q (str): The search text.
+        limit (int): The maximum number of results.
+        db (AsyncSession): The database session.
+        current_user (User): The authenticated user.
+
+    Returns:
+        list[TodoSearchResult]: The matching todos, best first.
+    """
+    return await search_todos(db, str(current_user.id), q, limit)
 
 @router.get("/{todo_id}", response_model=TodoResponse)
-def read_todo_endpoint(todo_id: str, db: Session = Depends(init_db)):
+async def read_todo_endpoint(todo_id: str, request: Request, response: Response, db: AsyncSession = Depends(init_read_db)):
     """
     Retrieve a single todo item by ID.
 
+    The response carries an `ETag`; send it back in `If-None-Match` to get an
+    empty `304 Not Modified` while the todo is unchanged.
+
     Args:
         todo_id (str): The ID of the todo item to retrieve.
-        db (Session): The database session.
+        request (Request): The incoming request, read for `If-None-Match`.
+        response (Response): The outgoing response, used to set the ETag.
+        db (AsyncSession): The database session.
 
     Returns:
         TodoResponse: The retrieved todo item.
@@ -42,57 +184,143 @@ def read_todo_endpoint(todo_id: str, db: Session = Depends(init_db)):
     Raises:
         HTTPException: If the todo item is not found.
     """
-    todo = get_todo(db, todo_id)
+    todo = await get_todo(db, todo_id)
     if todo is None:
         raise HTTPException(status_code=404, detail="Todo not found")
-    return todo
+    return not_modified(request, response, entity_etag(todo)) or todo
 
 @router.get("/", response_model=list[TodoResponse])
-def read_todos_endpoint(skip: int = 0, limit: int = 100, db: Session = Depends(init_db)):
+async def read_todos_endpoint(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    completed: Optional[bool] = None,
+    priority: Optional[List[int]] = Query(None),
+    due_before: Optional[datetime] = None,
+    due_after: Optional[datetime] = None,
+    owner: Optional[Literal["me"]] = None,
+    sort: Literal["created_at", "due_date", "priority"] = "created_at",
+    db: AsyncSession = Depends(init_read_db),
+    current_user: Optional[User] = Depends(get_optional_user)
+):
     """
-    Retrieve a list of todo items.
+    Retrieve a filtered list of todo items.
+
+    Pass the `X-Next-Cursor` response header back as `cursor` to fetch the next
+    page; unlike `skip`, its cost does not grow with the page depth. Cursors
+    are only available with the default `sort=created_at`. The page's `ETag`
+    can be sent back in `If-None-Match` to get a `304` while it is unchanged.
 
     Args:
-        skip (int): The number of todo items to skip.
+        request (Request): The incoming request, read for `If-None-Match`.
+        response (Response): The outgoing response, used to set the next-page cursor and ETag.
+        skip (int): The number of todo items to skip. Ignored when a cursor is given.
         limit (int): The maximum number of todo items to return.
-        db (Session): The database session.
+        cursor (Optional[str]): Cursor returned with the previous page.
+        completed (Optional[bool]): Only completed or only pending todos.
+        priority (Optional[List[int]]): Only these priorities; repeat the parameter for several.
+        due_before (Optional[datetime]): Only todos due before this time.
+        due_after (Optional[datetime]): Only todos due at or after this time.
+        owner (Optional[str]): "me" for the authenticated user's todos only.
+        sort (str): Order by "created_at" (default), "due_date" or "priority".
+        db (AsyncSession): The database session.
+        current_user (Optional[User]): The authenticated user, if any.
 
     Returns:
         list[TodoResponse]: A list of todo items.
+
+    Raises:
+        HTTPException: If `owner=me` is given without authentication.
     """
-    todos = get_todos(db, skip=skip, limit=limit)
-    return todos
+    if owner == "me" and current_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    todos = await get_todos(
+        db, skip=skip, limit=limit, cursor=cursor, sort=sort,
+        user_id=str(current_user.id) if owner == "me" else None,
+        completed=completed, priorities=priority, due_before=due_before, due_after=due_after
+    )
+    if sort == "created_at":
+        set_next_cursor(response, todos, limit)
+    return not_modified(request, response, collection_etag(todos)) or todos
+
+@router.get("/{todo_id}/similar", response_model=list[TodoSimilarResult])
+async def similar_todos_endpoint(todo_id: str, limit: int = Query(10, ge=1, le=100), db: AsyncSession = Depends(init_db), current_user: User = Depends(get_current_user)):
+    """
+    Retrieve the authenticated user's todos most similar to one of theirs.
+
+    Args:
+        todo_id (str): The ID of the todo to compare against.
+        limit (int): The maximum number of results.
+        db (AsyncSession): The database session.
+        current_user (User): The authenticated user.
+
+    Returns:
+        list[TodoSimilarResult]: The similar todos with their cosine similarity, most similar first.
+
+    Raises:
+        HTTPException: If the todo is not found or belongs to another user.
+    """
+    todo = await get_todo(db, todo_id)
+    if todo is None or str(todo.user_id) != str(current_user.id):
+        raise HTTPException(status_code=404, detail="Todo not found")
+    return await similar_todos(db, todo, limit)
 
 @router.put("/{todo_id}", response_model=TodoResponse)
-def update_todo_endpoint(todo_id: str, todo: TodoUpdate, db: Session = Depends(init_db), current_user: User = Depends(get_current_user)):
+async def update_todo_endpoint(todo_id: str, todo: TodoUpdate, request: Request, response: Response, db: AsyncSession = Depends(init_db), current_user: User = Depends(get_current_user)):
     """
     Update an existing todo item.
 
+    With an `If-Match` header holding the todo's `ETag`, the update is only
+    applied if nobody changed the todo since; otherwise it fails with
+    `412 Precondition Failed`.
+
     Args:
         todo_id (str): The ID of the todo item to update.
         todo (TodoUpdate): The updated todo data.
-        db (Session): The database session.
+        request (Request): The incoming request, read for `If-Match`.
+        response (Response): The outgoing response, used to set the new ETag.
+        db (AsyncSession): The database session.
         current_user (User): The authenticated user.
 
     Returns:
         TodoResponse: The updated todo item.
 
     Raises:
-        HTTPException: If the todo item is not found.
+        HTTPException: If the todo item is not found, or was modified since the `If-Match` ETag.
     """
-    updated_todo = update_todo(db, todo_id, todo, str(current_user.id))
+    if_match = request.headers.get("If-Match")
+    expected_version = None
+    if if_match is not None:
+        found = await get_todo_with_version(db, todo_id)
+        if found is None or str(found[0].user_id) != str(current_user.id):
+            raise HTTPException(status_code=404, detail="Todo not found")
+        current, expected_version = found
+        if not etag_matches(if_match, entity_etag(current), weak=False):
+            raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Todo was modified")
+
+    updated_todo = await update_todo(db, todo_id, todo, str(current_user.id), expected_version=expected_version)
     if updated_todo is None:
+        if expected_version is not None and await get_todo(db, todo_id) is not None:
+            # Changed between the ETag check and the update
+            raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Todo was modified")
         raise HTTPException(status_code=404, detail="Todo not found")
+    response.headers["ETag"] = entity_etag(updated_todo)
     return updated_todo
 
 @router.delete("/{todo_id}")
-def delete_todo_endpoint(todo_id: str, db: Session = Depends(init_db), current_user: User = Depends(get_current_user)):
+async def delete_todo_endpoint(todo_id: str, db: AsyncSession = Depends(init_db), current_user: User = Depends(get_current_user)):
     """
     Delete a todo item by ID.
 
     Args:
         todo_id (str): The ID of the todo item to delete.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         current_user (User): The authenticated user.
 
     Returns:
@@ -101,45 +329,85 @@ def delete_todo_endpoint(todo_id: str, db: Session = Depends(init_db), current_u
     Raises:
         HTTPException: If the todo item is not found.
     """
-    deleted_todo = delete_todo(db, todo_id, str(current_user.id))
+    deleted_todo = await delete_todo(db, todo_id, str(current_user.id))
     if not deleted_todo:
         raise HTTPException(status_code=404, detail="Todo not found")
     return deleted_todo
 
-@router.post("/nlp/", response_model=TodoResponse)
-def create_todo_nlp_endpoint(description: str, db: Session = Depends(init_db), current_user: User = Depends(get_current_user)):
+@router.post("/nlp/", response_model=Union[TodoResponse, JobResponse])
+async def create_todo_nlp_endpoint(response: Response, description: str, background: bool = False, db: AsyncSession = Depends(init_db), current_user: User = Depends(get_current_user)):
     """
     Create a new todo item from natural language input.
 
+    With `background=true` the todo is stored right away with the raw
+    description and a 202 is returned with the job that expands it; poll
+    `GET /todos/nlp/jobs/{job_id}` for its progress.
+
     Args:
+        response (Response): The outgoing response, used to set the 202 status.
         description (str): The natural language description of the todo item.
-        db (Session): The database session.
+        background (bool): Expand the description in a background job.
+        db (AsyncSession): The database session.
         current_user (User): The authenticated user.
 
     Returns:
-        TodoResponse: The created todo item.
+        Union[TodoResponse, JobResponse]: The created todo item, or the queued job in background mode.
     """
+    if background:
+        todo_data = TodoCreate(
+            title=await run_in_threadpool(generate_title_from_description, description),
+            content=description,
+            priority=1
+        )
+        todo = await create_todo(db, todo_data, str(current_user.id))
+        job = await create_expand_job(db, str(todo.id), str(current_user.id), description)
+        nlp_job_queue.enqueue(str(job.id))
+        response.status_code = status.HTTP_202_ACCEPTED
+        return job
+
     # Expand the input description
-    expanded_description = expand_description(description)
-    # Generate a title from the expanded description
-    generated_title = generate_title_from_description(expanded_description)
+    expanded_description = await expand_description(description)
+    # Generate a title from the expanded description, off the event loop: spaCy parsing blocks
+    generated_title = await run_in_threadpool(generate_title_from_description, expanded_description)
     # Create a TodoCreate object with the generated title and expanded content
     todo_data = TodoCreate(
         title=generated_title,
         content=expanded_description,
         priority=1
     )
-    return create_todo(db, todo_data, str(current_user.id))
+    return await create_todo(db, todo_data, str(current_user.id))
+
+@router.get("/nlp/jobs/{job_id}", response_model=JobResponse)
+async def read_nlp_job_endpoint(job_id: str, db: AsyncSession = Depends(init_read_db), current_user: User = Depends(get_current_user)):
+    """
+    Retrieve the progress of a background NLP job.
+
+    Args:
+        job_id (str): The ID of the job.
+        db (AsyncSession): The database session.
+        current_user (User): The authenticated user.
+
+    Returns:
+        JobResponse: The job, with its status, attempts and last error.
+
+    Raises:
+        HTTPException: If the job is not found.
+    """
+    job = await get_job(db, job_id, str(current_user.id))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 @router.get("/productivity/")
-def analyze_productivity_endpoint(db: Session = Depends(init_db)):
+async def analyze_productivity_endpoint(db: AsyncSession = Depends(init_read_db), current_user: User = Depends(get_current_user)):
     """
-    Analyze productivity metrics.
+    Analyze productivity metrics for the authenticated user.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
+        current_user (User): The authenticated user.
 
     Returns:
         dict: A dictionary containing productivity metrics and insights.
     """
-    return analyze_productivity(db)
+    return await analyze_productivity(db, str(current_user.id))
@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from api.database.database import init_db
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.database.database import init_db, init_read_db
 from api.schemas.user import UserCreate, UserUpdate, UserResponse, UserLogin, TokenResponse
+from api.utils.etags import collection_etag, entity_etag, not_modified
+from api.utils.pagination import set_next_cursor
 from api.services.user_service import create_user, get_user, get_users, update_user, delete_user, login_user
 from fastapi import Body
 from api.services.user_service import refresh_access_token
@@ -9,13 +12,13 @@ from api.services.user_service import refresh_access_token
 router = APIRouter(prefix="/users", tags=["Users"])
 
 @router.post("/login", response_model=TokenResponse)
-def login_for_access_token(user_login: UserLogin, db: Session = Depends(init_db)):
+async def login_for_access_token(user_login: UserLogin, db: AsyncSession = Depends(init_db)):
     """
     Authenticate user and return access and refresh tokens.
 
     Args:
         user_login (UserLogin): User credentials (username and password).
-        db (Session): Database session.
+        db (AsyncSession): Database session.
 
     Returns:
         TokenResponse: User details, access token, and refresh token.
@@ -23,20 +26,20 @@ def login_for_access_token(user_login: UserLogin, db: Session = Depends(init_db)
     Raises:
         HTTPException: If authentication fails.
     """
-    return login_user(db, user_login)
+    return await login_user(db, user_login)
 
 
 @router.post("/refresh", response_model=TokenResponse)
-def refresh_token_endpoint(
+async def refresh_token_endpoint(
     refresh_token: str = Body(..., embed=True),
-    db: Session = Depends(init_db)
+    db: AsyncSession = Depends(init_db)
 ):
     """
     Refresh the access token using a valid refresh token.
 
     Args:
         refresh_token (str): The refresh token.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Returns:
         TokenResponse: New access and refresh tokens.
@@ -44,17 +47,17 @@ def refresh_token_endpoint(
     Raises:
         HTTPException: If the refresh token is invalid or expired.
     """
-    return refresh_access_token(db, refresh_token)
+    return await refresh_access_token(db, refresh_token)
 
 
 @router.post("/", response_model=UserResponse)
-def create_user_endpoint(user: UserCreate, db: Session = Depends(init_db)):
+async def create_user_endpoint(user: UserCreate, db: AsyncSession = Depends(init_db)):
     """
     Create a new user.
 
     Args:
         user (UserCreate): The user data to create.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Returns:
         UserResponse: The created user.
@@ -63,7 +66,7 @@ def create_user_endpoint(user: UserCreate, db: Session = Depends(init_db)):
         HTTPException: If there is an error creating the user.
     """
     try:
-        return create_user(db, user)
+        return await create_user(db, user)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -73,13 +76,18 @@ def create_user_endpoint(user: UserCreate, db: Session = Depends(init_db)):
         )
 
 @router.get("/{user_id}", response_model=UserResponse)
-def read_user_endpoint(user_id: str, db: Session = Depends(init_db)):
+async def read_user_endpoint(user_id: str, request: Request, response: Response, db: AsyncSession = Depends(init_read_db)):
     """
     Retrieve a single user by ID.
 
+    The response carries an `ETag`; send it back in `If-None-Match` to get an
+    empty `304 Not Modified` while the user is unchanged.
+
     Args:
         user_id (str): The ID of the user to retrieve.
-        db (Session): The database session.
+        request (Request): The incoming request, read for `If-None-Match`.
+        response (Response): The outgoing response, used to set the ETag.
+        db (AsyncSession): The database session.
 
     Returns:
         UserResponse: The retrieved user.
@@ -87,36 +95,45 @@ def read_user_endpoint(user_id: str, db: Session = Depends(init_db)):
     Raises:
         HTTPException: If the user is not found.
     """
-    user = get_user(db, user_id)
+    user = await get_user(db, user_id)
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return not_modified(request, response, entity_etag(user)) or user
 
 @router.get("/", response_model=list[UserResponse])
-def read_users_endpoint(skip: int = 0, limit: int = 100, db: Session = Depends(init_db)):
+async def read_users_endpoint(request: Request, response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, db: AsyncSession = Depends(init_read_db)):
     """
     Retrieve a list of users.
 
+    Pass the `X-Next-Cursor` response header back as `cursor` to fetch the next
+    page; unlike `skip`, its cost does not grow with the page depth. The
+    page's `ETag` can be sent back in `If-None-Match` to get a `304` while it
+    is unchanged.
+
     Args:
-        skip (int): The number of users to skip.
+        request (Request): The incoming request, read for `If-None-Match`.
+        response (Response): The outgoing response, used to set the next-page cursor and ETag.
+        skip (int): The number of users to skip. Ignored when a cursor is given.
         limit (int): The maximum number of users to return.
-        db (Session): The database session.
+        cursor (Optional[str]): Cursor returned with the previous page.
+        db (AsyncSession): The database session.
 
     Returns:
         list[UserResponse]: A list of users.
     """
-    users = get_users(db, skip=skip, limit=limit)
-    return users
+    users = await get_users(db, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, users, limit)
+    return not_modified(request, response, collection_etag(users)) or users
 
 @router.put("/{user_id}", response_model=UserResponse)
-def update_user_endpoint(user_id: str, user: UserUpdate, db: Session = Depends(init_db)):
+async def update_user_endpoint(user_id: str, user: UserUpdate, db: AsyncSession = Depends(init_db)):
     """
     Update an existing user.
 
     Args:
         user_id (str): The ID of the user to update.
         user (UserUpdate): The updated user data.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Returns:
         UserResponse: The updated user.
@@ -125,7 +142,7 @@ def update_user_endpoint(user_id: str, user: UserUpdate, db: Session = Depends(i
         HTTPException: If the user is not found or an error occurs during update.
     """
     try:
-        updated_user = update_user(db, user_id, user)
+        updated_user = await update_user(db, user_id, user)
         if updated_user is None:
             raise HTTPException(status_code=404, detail="User not found")
         return updated_user
@@ -133,13 +150,13 @@ def update_user_endpoint(user_id: str, user: UserUpdate, db: Session = Depends(i
         raise e
 
 @router.delete("/{user_id}")
-def delete_user_endpoint(user_id: str, db: Session = Depends(init_db)):
+async def delete_user_endpoint(user_id: str, db: AsyncSession = Depends(init_db)):
     """
     Delete a user by ID.
 
     Args:
         user_id (str): The ID of the user to delete.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Returns:
         UserResponse: The deleted user.
@@ -147,7 +164,7 @@ def delete_user_endpoint(user_id: str, db: Session = Depends(init_db)):
     Raises:
         HTTPException: If the user is not found.
     """
-    deleted_user = delete_user(db, user_id)
+    deleted_user = await delete_user(db, user_id)
     if not deleted_user:
         raise HTTPException(status_code=404, detail="User not found")
     return deleted_user
@@ -0,0 +1,22 @@
+from typing import List
+from pydantic import BaseModel
+from datetime import datetime
+
+class ProfileStatement(BaseModel):
+    statement: str
+    duration_ms: float
+    executemany: bool
+
+class ProfileSummary(BaseModel):
+    id: str
+    method: str
+    path: str
+    status: int
+    duration_ms: float
+    reason: str
+    captured_at: datetime
+    sample_count: int
+    statement_count: int
+
+class ProfileDetail(ProfileSummary):
+    statements: List[ProfileStatement]
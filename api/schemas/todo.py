@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Annotated, List, Literal, Optional, Union
 from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 
@@ -27,3 +27,59 @@ class TodoResponse(BaseModel):
     priority: Optional[int] = None
     due_date: Optional[datetime] = None
     model_config = ConfigDict(from_attributes=True)
+
+class TodoBatchCreate(BaseModel):
+    op: Literal["create"]
+    todo: TodoCreate
+
+class TodoBatchUpdate(BaseModel):
+    op: Literal["update"]
+    id: str
+    todo: TodoUpdate
+
+class TodoBatchDelete(BaseModel):
+    op: Literal["delete"]
+    id: str
+
+TodoBatchOperation = Annotated[Union[TodoBatchCreate, TodoBatchUpdate, TodoBatchDelete], Field(discriminator="op")]
+
+class TodoBatchRequest(BaseModel):
+    operations: List[TodoBatchOperation] = Field(..., min_length=1, max_length=1000)
+
+class TodoBatchResult(BaseModel):
+    op: str
+    id: Optional[str] = None
+    status: int
+    todo: Optional[TodoResponse] = None
+    error: Optional[str] = None
+
+class TodoBatchResponse(BaseModel):
+    results: List[TodoBatchResult]
+
+class TodoSearchResult(BaseModel):
+    todo: TodoResponse
+    rank: float
+    highlighted_title: Optional[str] = None
+    snippet: Optional[str] = None
+
+class TodoSimilarResult(BaseModel):
+    todo: TodoResponse
+    score: float
+
+class TodoChangeResponse(BaseModel):
+    seq: int
+    op: Literal["create", "update", "delete"]
+    todo_id: str
+    created_at: datetime
+    todo: Optional[TodoResponse] = None
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    status: str
+    todo_id: str
+    attempts: int
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    model_config = ConfigDict(from_attributes=True)
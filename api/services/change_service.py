@@ -0,0 +1,125 @@
+import asyncio
+import json
+from typing import AsyncIterator, List, Optional, Tuple
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.core.settings import settings
+from api.database.database import AsyncSessionLocal
+from api.models.model import Todo, TodoChange
+from api.schemas.todo import TodoResponse
+from api.utils.pubsub import PubSub
+
+CHANGE_CREATE = "create"
+CHANGE_UPDATE = "update"
+CHANGE_DELETE = "delete"
+
+# Changes read per query by the long-poll and the SSE stream
+CHANGE_PAGE_SIZE = 100
+
+# Wakes a user's long-polls and SSE streams after their todos were written.
+# Writes handled by other workers are picked up at the next SSE heartbeat.
+change_feed = PubSub()
+
+async def record_todo_changes(db: AsyncSession, user_id: str, changes: List[Tuple[str, str]]) -> None:
+    """
+    Append (todo_id, op) entries to a user's change log, within the caller's transaction.
+
+    Call `publish_changes` once the transaction has been committed.
+    """
+    if changes:
+        await db.execute(insert(TodoChange), [
+            {"user_id": user_id, "todo_id": todo_id, "op": op} for todo_id, op in changes
+        ])
+
+def publish_changes(user_id: str) -> None:
+    """Wake the change feed listeners of a user after a committed write."""
+    change_feed.publish(user_id)
+
+async def get_changes(db: AsyncSession, user_id: str, since: int = 0, limit: int = CHANGE_PAGE_SIZE) -> List[dict]:
+    """
+    Retrieve a user's todo changes after a sequence number, oldest first.
+
+    Args:
+        db (AsyncSession): The database session.
+        user_id (str): The ID of the user whose changes to read.
+        since (int): The `seq` of the last change the client has applied, 0 for all.
+        limit (int): The maximum number of changes.
+
+    Returns:
+        List[dict]: The changes, each with its `seq`, `op`, `todo_id`,
+        `created_at` and the todo's current state as `todo` (None once deleted).
+    """
+    result = await db.execute(
+        select(TodoChange, Todo)
+        .outerjoin(Todo, Todo.id == TodoChange.todo_id)
+        .filter(TodoChange.user_id == user_id, TodoChange.seq > since)
+        .order_by(TodoChange.seq)
+        .limit(limit)
+    )
+    return [
+        {"seq": change.seq, "op": change.op, "todo_id": change.todo_id, "created_at": change.created_at, "todo": todo}
+        for change, todo in result.all()
+    ]
+
+async def wait_for_changes(db: AsyncSession, user_id: str, since: int = 0, limit: int = CHANGE_PAGE_SIZE, timeout: float = 0) -> List[dict]:
+    """
+    Long-poll a user's changes: return them at once if there are any, or wait up to `timeout` seconds for one.
+
+    The session is closed while waiting, so an idle long-poll holds no
+    database connection.
+    """
+    with change_feed.subscribe(user_id) as event:
+        changes = await get_changes(db, user_id, since, limit)
+        if changes or timeout <= 0:
+            return changes
+        await db.close()
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        return await get_changes(db, user_id, since, limit)
+
+def format_event(change: dict) -> str:
+    """Serialize a change as a Server-Sent Event whose id is its `seq`."""
+    data = {
+        **change,
+        "created_at": change["created_at"].isoformat(),
+        "todo": TodoResponse.model_validate(change["todo"]).model_dump(mode="json") if change["todo"] is not None else None,
+    }
+    return f"id: {change['seq']}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_changes(user_id: str, since: int = 0, heartbeat: Optional[float] = None) -> AsyncIterator[str]:
+    """
+    Stream a user's changes after `since` as Server-Sent Events, forever.
+
+    Between bursts the stream waits on the change feed rather than polling;
+    a comment line is sent every `heartbeat` seconds (default
+    CHANGE_FEED_HEARTBEAT) to keep proxies from closing the connection, and
+    the log is checked again for writes made by other workers. The generator
+    opens its own sessions because it runs after the request's dependencies
+    have been closed.
+
+    Args:
+        user_id (str): The ID of the user whose changes to stream.
+        since (int): The `seq` of the last change the client has applied.
+        heartbeat (Optional[float]): Seconds between keep-alive comments.
+
+    Yields:
+        str: Server-Sent Events, one per change.
+    """
+    heartbeat = settings.CHANGE_FEED_HEARTBEAT if heartbeat is None else heartbeat
+    with change_feed.subscribe(user_id) as event:
+        while True:
+            # Cleared before reading, so a write committed during the read wakes the next wait
+            event.clear()
+            async with AsyncSessionLocal() as db:
+                changes = await get_changes(db, user_id, since)
+            for change in changes:
+                yield format_event(change)
+                since = change["seq"]
+            if len(changes) == CHANGE_PAGE_SIZE:
+                continue
+            try:
+                await asyncio.wait_for(event.wait(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
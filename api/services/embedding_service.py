@@ -0,0 +1,167 @@
+import hashlib
+import re
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.core.settings import settings
+from api.models.model import Todo, TodoEmbedding
+from api.services.nlp_service import get_nlp, model_has_vectors
+from api.utils.cache import MemoryCache
+from api.utils.vectors import VectorIndex, from_blobs, normalize, to_blob
+
+# Response header listing likely duplicates of a newly created todo
+DUPLICATES_HEADER = "X-Possible-Duplicates"
+
+# Dimensions of the hashing embedder, used when no spaCy word vectors are available
+HASH_DIM = 256
+
+# Per-user vector indexes, updated in place by this process's writes.
+# Writes handled by other workers show up once the entry expires.
+index_cache = MemoryCache(maxsize=settings.SIMILARITY_CACHE_SIZE, ttl=settings.SIMILARITY_CACHE_TTL)
+
+# Embedder of this process, decided on first use
+_embedder: Optional[Tuple[str, int]] = None
+
+def embedder() -> Tuple[str, int]:
+    """
+    Name and dimensions of the embedder in use.
+
+    The mean of the spaCy model's static word vectors when it has any
+    (e.g. en_core_web_md), otherwise hashed word and character trigram features.
+    The pipeline is only loaded when the model's meta lists vectors. This may
+    block on the first call, so async code goes through `embedder_async`.
+    """
+    global _embedder
+    if _embedder is None:
+        nlp = get_nlp() if model_has_vectors() else None
+        if nlp is not None and nlp.vocab.vectors.shape[0] > 0:
+            _embedder = f"spacy:{settings.NLP_MODEL}", nlp.vocab.vectors_length
+        else:
+            _embedder = f"hash:{HASH_DIM}", HASH_DIM
+    return _embedder
+
+def hash_embed(text: str) -> np.ndarray:
+    """Embed text as signed counts of its hashed words and character trigrams."""
+    vector = np.zeros(HASH_DIM, dtype=np.float32)
+    for word in re.findall(r"\w+", text.lower()):
+        padded = f"#{word}#"
+        for feature in [word] + [padded[i:i + 3] for i in range(len(padded) - 2)]:
+            # blake2b rather than hash(), which is salted per process
+            digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[digest % HASH_DIM] += 1.0 if digest >> 63 else -1.0
+    return vector
+
+def embed(texts: List[str]) -> np.ndarray:
+    """Embed texts as an (n, dim) matrix of unit-length float32 rows."""
+    name, dim = embedder()
+    if name.startswith("spacy:"):
+        # Tokenizing is enough for static vectors, the rest of the pipeline is skipped
+        nlp = get_nlp()
+        vectors = [nlp.make_doc(text).vector for text in texts]
+    else:
+        vectors = [hash_embed(text) for text in texts]
+    return normalize(np.array(vectors, dtype=np.float32).reshape(len(texts), dim))
+
+async def embedder_async() -> Tuple[str, int]:
+    """`embedder`, decided in the threadpool the first time."""
+    return _embedder or await run_in_threadpool(embedder)
+
+async def embed_async(texts: List[str]) -> np.ndarray:
+    """`embed`, run in the threadpool so neither the model load nor the embedding blocks the event loop."""
+    return await run_in_threadpool(embed, texts)
+
+def todo_text(todo: Todo) -> str:
+    return f"{todo.title or ''}\n{todo.content or ''}"
+
+async def index_todos(db: AsyncSession, todos: List[Todo]) -> None:
+    """
+    Store fresh embeddings of todos, within the caller's transaction.
+
+    Call after a todo is created or its title or content changed. Cached
+    indexes of the todos' owners are updated in place.
+    """
+    if not todos:
+        return
+    name, _ = await embedder_async()
+    vectors = await embed_async([todo_text(todo) for todo in todos])
+    ids = [str(todo.id) for todo in todos]
+    await db.execute(delete(TodoEmbedding).filter(TodoEmbedding.todo_id.in_(ids)))
+    await db.execute(insert(TodoEmbedding), [
+        {"todo_id": id, "user_id": str(todo.user_id), "model": name, "vector": to_blob(vector)}
+        for id, todo, vector in zip(ids, todos, vectors)
+    ])
+    for id, todo, vector in zip(ids, todos, vectors):
+        index = index_cache.get(str(todo.user_id))
+        if index is not None:
+            index.add([id], vector)
+
+async def unindex_todos(db: AsyncSession, todo_ids: Iterable[str], user_id: str) -> None:
+    """Drop the embeddings of todos about to be deleted, within the caller's transaction."""
+    todo_ids = list(todo_ids)
+    if not todo_ids:
+        return
+    await db.execute(delete(TodoEmbedding).filter(TodoEmbedding.todo_id.in_(todo_ids)))
+    index = index_cache.get(user_id)
+    if index is not None:
+        index.remove(todo_ids)
+
+async def get_user_index(db: AsyncSession, user_id: str) -> VectorIndex:
+    """
+    Return the vector index of a user's todos, loading it on a cache miss.
+
+    Todos without an embedding from the current embedder (created before
+    the index existed, or embedded by another one) are embedded and stored first.
+    """
+    index = index_cache.get(user_id)
+    if index is not None:
+        return index
+    name, dim = await embedder_async()
+    missing = await db.execute(
+        select(Todo)
+        .outerjoin(TodoEmbedding, and_(TodoEmbedding.todo_id == Todo.id, TodoEmbedding.model == name))
+        .filter(Todo.user_id == user_id, TodoEmbedding.todo_id.is_(None))
+    )
+    missing_todos = list(missing.scalars().all())
+    if missing_todos:
+        await index_todos(db, missing_todos)
+        await db.commit()
+
+    rows = (await db.execute(
+        select(TodoEmbedding.todo_id, TodoEmbedding.vector)
+        .filter(TodoEmbedding.user_id == user_id, TodoEmbedding.model == name)
+    )).all()
+    index = VectorIndex(dim, capacity=max(64, len(rows)))
+    if rows:
+        index.add([row.todo_id for row in rows], from_blobs([row.vector for row in rows], dim))
+    index_cache.set(user_id, index)
+    return index
+
+async def similar_todos(db: AsyncSession, todo: Todo, limit: int = 10) -> List[dict]:
+    """
+    Find a user's todos most similar to one of theirs, by cosine similarity.
+
+    Args:
+        db (AsyncSession): The database session.
+        todo (Todo): The todo to compare against; it is left out of the results.
+        limit (int): The maximum number of results.
+
+    Returns:
+        List[dict]: The similar todos, most similar first, each with its `todo` and `score`.
+    """
+    index = await get_user_index(db, str(todo.user_id))
+    vector = index.get(str(todo.id))
+    if vector is None:
+        vector = (await embed_async([todo_text(todo)]))[0]
+    matches = index.search(vector, limit, exclude=[str(todo.id)])[0]
+    if not matches:
+        return []
+    result = await db.execute(select(Todo).filter(Todo.id.in_([id for id, _ in matches])))
+    todos = {todo.id: todo for todo in result.scalars().all()}
+    return [{"todo": todos[id], "score": score} for id, score in matches if id in todos]
+
+async def find_duplicates(db: AsyncSession, todo: Todo, threshold: Optional[float] = None) -> List[dict]:
+    """Return the user's other todos at least `threshold` (default DUPLICATE_THRESHOLD) similar to a todo."""
+    threshold = settings.DUPLICATE_THRESHOLD if threshold is None else threshold
+    return [match for match in await similar_todos(db, todo, limit=5) if match["score"] >= threshold]
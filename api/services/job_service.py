@@ -0,0 +1,166 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.core.settings import settings
+from api.database.database import AsyncSessionLocal
+from api.models.model import Job
+from api.schemas.todo import TodoUpdate
+from api.services.todo_service import expansion_batcher, generate_title_from_description, get_todo_with_version, update_todo
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+EXPAND_TODO = "expand_todo"
+
+def claimable(now: datetime):
+    """
+    Condition matching the jobs a worker may claim.
+
+    Pending jobs, and running jobs whose claim is older than NLP_JOB_LEASE_SECONDS:
+    the process running them died before finishing.
+    """
+    expired = now - timedelta(seconds=settings.NLP_JOB_LEASE_SECONDS)
+    return or_(Job.status == JOB_PENDING, and_(Job.status == JOB_RUNNING, Job.updated_at < expired))
+
+class JobQueue:
+    """
+    In-process worker pool for jobs persisted in the jobs table.
+
+    Job ids are handed to `workers` asyncio tasks through an in-memory queue;
+    the table is the source of truth, so on `start` pending jobs and running
+    jobs whose lease expired are picked up again. Several processes may queue
+    the same job; a worker only runs it once its claim succeeded.
+    """
+    def __init__(self, handler: Callable[[str], Awaitable[None]], workers: int = 4):
+        self.handler = handler
+        self.workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list = []
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Job.id).filter(claimable(datetime.now(timezone.utc))).order_by(Job.created_at)
+            )
+            for job_id in result.scalars().all():
+                self.enqueue(job_id)
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    def enqueue(self, job_id: str) -> None:
+        """Schedule a job. Without running workers it stays pending until the next start."""
+        if self._queue is not None:
+            self._queue.put_nowait(job_id)
+
+    async def join(self) -> None:
+        """Wait until every queued job has been processed."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def _work(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self.handler(job_id)
+            except Exception:
+                logging.error(f"Job {job_id} crashed", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+async def create_expand_job(db: AsyncSession, todo_id: str, user_id: str, description: str) -> Job:
+    """
+    Persist a job that expands a todo's description in the background.
+
+    Args:
+        db (AsyncSession): The database session.
+        todo_id (str): The ID of the todo to rewrite.
+        user_id (str): The ID of the todo's owner.
+        description (str): The raw description the todo was created with.
+
+    Returns:
+        Job: The created job.
+    """
+    result = await db.execute(
+        insert(Job)
+        .values(kind=EXPAND_TODO, status=JOB_PENDING, todo_id=todo_id, user_id=user_id, payload=description, attempts=0)
+        .returning(Job)
+    )
+    job = result.scalars().one()
+    await db.commit()
+    return job
+
+async def get_job(db: AsyncSession, job_id: str, user_id: str) -> Optional[Job]:
+    """
+    Retrieve a job owned by a user.
+
+    Args:
+        db (AsyncSession): The database session.
+        job_id (str): The ID of the job.
+        user_id (str): The ID of the user.
+
+    Returns:
+        Optional[Job]: The job if found and owned by the user, otherwise None.
+    """
+    result = await db.execute(select(Job).filter(Job.id == job_id, Job.user_id == user_id))
+    return result.scalars().first()
+
+async def process_expand_job(job_id: str) -> None:
+    """
+    Expand a todo's raw description and write the result back to the todo.
+
+    The todo is left alone if its content was edited since it was created,
+    or if it is edited while the LLM call runs: the write only goes through
+    at the version read before the call. Failed attempts, including an
+    unavailable LLM, are retried up to NLP_JOB_MAX_ATTEMPTS times.
+    """
+    async with AsyncSessionLocal() as db:
+        # A conditional update, so that of the workers and processes holding
+        # this job id exactly one gets to run it
+        now = datetime.now(timezone.utc)
+        claimed = await db.execute(
+            update(Job)
+            .filter(Job.id == job_id, claimable(now))
+            .values(status=JOB_RUNNING, attempts=Job.attempts + 1, updated_at=now)
+        )
+        await db.commit()
+        if claimed.rowcount != 1:
+            return
+        job = await db.get(Job, job_id)
+
+        try:
+            found = await get_todo_with_version(db, job.todo_id)
+            # End the read transaction, so it is not held open across the LLM call
+            await db.commit()
+            if found is not None and found[0].content == job.payload:
+                todo, version = found
+                # Not expand_description: its fallback to the raw text would mark the job done
+                expanded = await expansion_batcher.submit(job.payload)
+                title = await run_in_threadpool(generate_title_from_description, expanded)
+                await update_todo(db, todo.id, TodoUpdate(title=title, content=expanded), job.user_id, expected_version=version)
+            job = await db.get(Job, job_id)
+            job.status = JOB_DONE
+            job.error = None
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            job = await db.get(Job, job_id)
+            job.error = str(e)
+            job.status = JOB_FAILED if job.attempts >= settings.NLP_JOB_MAX_ATTEMPTS else JOB_PENDING
+            await db.commit()
+            if job.status == JOB_PENDING:
+                nlp_job_queue.enqueue(job_id)
+
+nlp_job_queue = JobQueue(process_expand_job, workers=settings.NLP_JOB_WORKERS)
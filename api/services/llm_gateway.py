@@ -0,0 +1,138 @@
+import asyncio
+import time
+from collections import deque
+from typing import Optional
+from openai import AsyncOpenAI
+from api.core.settings import settings
+from api.utils.metrics import record_llm_call
+
+class LLMUnavailableError(Exception):
+    """Raised when an LLM call fails, misses its deadline or is rejected by the circuit breaker."""
+
+class CircuitBreaker:
+    """
+    Error-rate circuit breaker over a sliding window of recent calls.
+
+    The breaker opens once at least `min_calls` of the last `window` calls were
+    recorded and the share of failures reaches `error_rate`. While open, calls
+    are rejected until `cooldown` seconds have passed; then a single probe call
+    is let through, which closes the breaker on success or reopens it on failure.
+    """
+    def __init__(self, error_rate: float = 0.5, min_calls: int = 10, window: int = 20, cooldown: float = 30.0):
+        self.error_rate = error_rate
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self._outcomes: deque = deque(maxlen=window)
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Return whether a call may go through now."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def release(self) -> None:
+        """Forget an allowed call that was cancelled before it finished, freeing the probe slot."""
+        self._probing = False
+
+    def record(self, success: bool) -> None:
+        """Record the outcome of an allowed call."""
+        if self._probing:
+            self._probing = False
+            if success:
+                self._opened_at = None
+                self._outcomes.clear()
+            else:
+                self._opened_at = time.monotonic()
+            return
+        self._outcomes.append(success)
+        failures = self._outcomes.count(False)
+        if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.error_rate:
+            self._opened_at = time.monotonic()
+
+class LLMGateway:
+    """
+    Async front door for every LLM call.
+
+    Each call gets a deadline covering both the wait for a concurrency slot and
+    the request itself, at most `max_concurrency` calls are in flight at once,
+    and a circuit breaker fails calls fast while the provider is unhealthy.
+    Callers catch `LLMUnavailableError` and fall back to a local answer.
+    """
+    def __init__(self, client: AsyncOpenAI, timeout: float = 10.0, max_concurrency: int = 16,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.client = client
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def complete(self, instructions: str, input: str, model: str = "gpt-4o",
+                       temperature: float = 0.7, timeout: Optional[float] = None) -> str:
+        """
+        Run a Responses API call and return its output text.
+
+        Args:
+            instructions (str): The system prompt.
+            input (str): The user prompt.
+            model (str): The model name.
+            temperature (float): The sampling temperature.
+            timeout (Optional[float]): Deadline in seconds, defaults to the gateway's.
+
+        Returns:
+            str: The stripped output text.
+
+        Raises:
+            LLMUnavailableError: If the breaker is open, the deadline passes or the call fails.
+        """
+        if not self.breaker.allow():
+            raise LLMUnavailableError("Circuit breaker is open")
+        deadline = timeout or self.timeout
+        start = time.perf_counter()
+        try:
+            output = await asyncio.wait_for(
+                self._create(deadline, model=model, instructions=instructions, input=input, temperature=temperature),
+                deadline
+            )
+        except asyncio.CancelledError:
+            # The caller went away; that says nothing about the provider
+            self.breaker.release()
+            raise
+        except Exception as e:
+            self.breaker.record(False)
+            record_llm_call(time.perf_counter() - start, success=False)
+            raise LLMUnavailableError(str(e) or type(e).__name__) from e
+        self.breaker.record(True)
+        record_llm_call(time.perf_counter() - start, success=True)
+        return output
+
+    async def _create(self, deadline: float, **request) -> str:
+        async with self._semaphore:
+            response = await self.client.responses.create(timeout=deadline, **request)
+            return response.output_text.strip()
+
+def create_gateway() -> LLMGateway:
+    """Build the LLM gateway from Settings."""
+    return LLMGateway(
+        AsyncOpenAI(api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL, max_retries=0),
+        timeout=settings.LLM_TIMEOUT,
+        max_concurrency=settings.LLM_MAX_CONCURRENCY,
+        breaker=CircuitBreaker(
+            error_rate=settings.LLM_BREAKER_ERROR_RATE,
+            min_calls=settings.LLM_BREAKER_MIN_CALLS,
+            window=settings.LLM_BREAKER_WINDOW,
+            cooldown=settings.LLM_BREAKER_COOLDOWN
+        )
+    )
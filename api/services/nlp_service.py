@@ -0,0 +1,101 @@
+import gc
+import logging
+import threading
+from typing import Optional
+from api.core.settings import settings
+
+# Loaded spaCy pipeline, False once loading failed, None until first use
+_nlp = None
+_lock = threading.Lock()
+
+# Only the start of a description matters for its title
+MAX_TITLE_INPUT = 1000
+
+def get_nlp():
+    """
+    Return the shared spaCy pipeline, loading it on first use.
+
+    Returns:
+        Optional[Language]: The pipeline, or None if NLP is disabled or the
+        model cannot be loaded.
+    """
+    global _nlp
+    if not settings.NLP_ENABLED:
+        return None
+    if _nlp is None:
+        with _lock:
+            if _nlp is None:
+                try:
+                    import spacy
+                    # Titles only need the tagger and parser
+                    _nlp = spacy.load(settings.NLP_MODEL, exclude=["ner", "lemmatizer"])
+                except (ImportError, OSError):
+                    logging.warning(f"spaCy model {settings.NLP_MODEL} is unavailable, NLP features are disabled")
+                    _nlp = False
+    return _nlp or None
+
+def model_has_vectors() -> bool:
+    """
+    Return whether the configured model ships static word vectors.
+
+    Reads the model's meta.json instead of loading the pipeline, so callers
+    that only want the vectors can skip loading models without any (e.g.
+    en_core_web_sm).
+    """
+    if not settings.NLP_ENABLED:
+        return False
+    try:
+        from pathlib import Path
+        from spacy import util
+        path = util.get_package_path(settings.NLP_MODEL) if util.is_package(settings.NLP_MODEL) else Path(settings.NLP_MODEL)
+        return util.get_model_meta(path).get("vectors", {}).get("vectors", 0) > 0
+    except (ImportError, OSError, ValueError):
+        return False
+
+def preload() -> None:
+    """
+    Load the pipeline now instead of on first use.
+
+    Called at import time when NLP_PRELOAD is set. Under a pre-forking server
+    (e.g. `gunicorn --preload`), the model is then loaded once in the master
+    and shared copy-on-write by every worker. Freezing the GC keeps collections
+    in the workers from touching, and so copying, those pages.
+    """
+    if get_nlp() is not None:
+        gc.freeze()
+
+def extract_title(description: str) -> Optional[str]:
+    """
+    Build a short title from the first sentence's main verb and noun chunks.
+
+    "I need to finish the quarterly report by Friday" gives "Finish the
+    quarterly report". Runs locally, without any network call.
+
+    Args:
+        description (str): The todo description.
+
+    Returns:
+        Optional[str]: The title, or None if NLP is unavailable or no noun chunk was found.
+    """
+    nlp = get_nlp()
+    if nlp is None or not description or not nlp.has_pipe("parser"):
+        return None
+    sentence = next(iter(nlp(description[:MAX_TITLE_INPUT]).sents), None)
+    if sentence is None:
+        return None
+    chunks = [chunk for chunk in sentence.noun_chunks if chunk.root.pos_ != "PRON"]
+    if not chunks:
+        return None
+
+    # Prefer a verb with its object, e.g. "finish" + "the quarterly report"
+    for chunk in chunks:
+        head = chunk.root.head
+        if chunk.root.dep_ in ("dobj", "obj") and head.pos_ == "VERB":
+            title = f"{head.text} {chunk.text}"
+            break
+    else:
+        title = chunks[0].text
+    return title[:1].upper() + title[1:]
+
+if settings.NLP_PRELOAD:
+    preload()
@@ -0,0 +1,98 @@
+import html
+import re
+from typing import List, Optional
+from sqlalchemy import and_, column, func, literal, literal_column, or_, select, table
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.models.model import Todo
+
+# Marks around matched terms in titles and snippets
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+
+# Private-use characters FTS5 puts around matches, swapped for the marks once
+# the text around them is HTML-escaped
+MATCH_START = "\ue000"
+MATCH_END = "\ue001"
+
+# Words of context in a content snippet
+SNIPPET_TOKENS = 16
+
+# bm25 weights of the title, content and user_id columns of todos_fts
+BM25_WEIGHTS = (10.0, 1.0, 0.0)
+
+# FTS5 index over todos.title and todos.content, kept in sync by triggers (see migration 9d3b6a1f4e28)
+todos_fts = table("todos_fts", column("rowid"), column("user_id"))
+
+def to_html(text: Optional[str]) -> Optional[str]:
+    """HTML-escape text from the user, then turn the FTS5 match delimiters into marks."""
+    if text is None:
+        return None
+    return html.escape(text).replace(MATCH_START, HIGHLIGHT_START).replace(MATCH_END, HIGHLIGHT_END)
+
+def search_terms(query: str) -> List[str]:
+    """Split a free-text query into the words it searches for."""
+    return re.findall(r"\w+", query)
+
+def fts_query(terms: List[str], user_id: str) -> str:
+    """
+    Build an FTS5 MATCH expression requiring every term in the title or content of a user's todos.
+
+    Each term is quoted, so characters with a meaning in the FTS5 query
+    syntax are taken literally.
+    """
+    phrases = " ".join(f'"{term}"' for term in terms)
+    return f'user_id : "{user_id}" AND {{title content}} : ({phrases})'
+
+async def search_todos(db: AsyncSession, user_id: str, query: str, limit: int = 20) -> List[dict]:
+    """
+    Full-text search over a user's todo titles and contents.
+
+    On SQLite the todos_fts index answers the query and ranks the matches by
+    BM25, with title matches weighted above content matches. Other backends
+    fall back to a case-insensitive LIKE scan of the user's todos, newest first.
+
+    Args:
+        db (AsyncSession): The database session.
+        user_id (str): The ID of the user whose todos to search.
+        query (str): The search text. Every word must match.
+        limit (int): The maximum number of results.
+
+    Returns:
+        List[dict]: The matching todos, best first, each with its `todo`,
+        `rank` (lower is better), `highlighted_title` and content `snippet`.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+
+    if db.bind.dialect.name != "sqlite":
+        matches = [or_(Todo.title.ilike(f"%{term}%"), Todo.content.ilike(f"%{term}%")) for term in terms]
+        result = await db.execute(
+            select(Todo).filter(Todo.user_id == user_id, and_(*matches)).order_by(Todo.created_at.desc()).limit(limit)
+        )
+        return [
+            {"todo": todo, "rank": 0.0, "highlighted_title": to_html(todo.title), "snippet": to_html(todo.content)}
+            for todo in result.scalars().all()
+        ]
+
+    fts = literal_column("todos_fts")
+    rank = func.bm25(fts, *BM25_WEIGHTS).label("rank")
+    result = await db.execute(
+        select(
+            Todo,
+            rank,
+            func.highlight(fts, 0, MATCH_START, MATCH_END),
+            func.snippet(fts, 1, MATCH_START, MATCH_END, "…", SNIPPET_TOKENS),
+        )
+        .select_from(todos_fts)
+        # Filtering on user_id here too keeps a search to the user's own todos
+        # even if the rowids the index holds went stale (see migration 9d3b6a1f4e28)
+        .join(Todo, and_(literal_column("todos.rowid") == todos_fts.c.rowid, Todo.user_id == user_id))
+        .filter(fts.op("MATCH")(literal(fts_query(terms, user_id))))
+        .order_by(rank)
+        .limit(limit)
+    )
+    return [
+        {"todo": todo, "rank": score, "highlighted_title": to_html(title), "snippet": to_html(snippet)}
+        for todo, score, title, snippet in result.all()
+    ]
@@ -0,0 +1,185 @@
+from typing import List, Optional
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import Date, case, delete, func, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.models.model import Todo, UserStats
+
+# Number of days of daily completion history reported by get_productivity_stats
+COMPLETION_HISTORY_DAYS = 30
+
+# Bucket values standing in for a missing priority / due date
+NO_PRIORITY = 0
+NO_DAY = date.max
+
+BUCKET_KEY = ["user_id", "priority", "completed", "day"]
+
+_INSERTS = {
+    "sqlite": sqlite_insert,
+    "postgresql": postgresql_insert,
+}
+
+def todo_bucket_columns() -> list:
+    """
+    SQL expressions mapping a todo row to its UserStats bucket.
+
+    A completed todo's `updated_at` is taken as its completion date.
+    """
+    completed = func.coalesce(Todo.completed, False)
+    return [
+        Todo.user_id,
+        func.coalesce(Todo.priority, NO_PRIORITY),
+        completed,
+        case(
+            (completed == True, func.date(Todo.updated_at, type_=Date)),
+            else_=func.coalesce(func.date(Todo.due_date, type_=Date), NO_DAY)
+        ),
+    ]
+
+async def record_todo_stats(db: AsyncSession, todo_id: str, delta: int, user_id: Optional[str] = None) -> None:
+    """
+    Add `delta` to the bucket a todo currently falls in.
+
+    Call with -1 before changing or deleting a todo and with +1 after its
+    changes have been flushed, within the same transaction as the write.
+
+    Args:
+        db (AsyncSession): The database session.
+        todo_id (str): The ID of the todo.
+        delta (int): The amount to add to the bucket's count.
+        user_id (Optional[str]): Only count the todo if it belongs to this user.
+    """
+    await record_todos_stats(db, [todo_id], delta, user_id)
+
+async def record_todos_stats(db: AsyncSession, todo_ids: List[str], delta: int, user_id: Optional[str] = None) -> None:
+    """
+    Add `delta` per todo to the buckets a set of todos currently fall in, in one statement.
+
+    Args:
+        db (AsyncSession): The database session.
+        todo_ids (List[str]): The IDs of the todos.
+        delta (int): The amount to add to a bucket for each of its todos.
+        user_id (Optional[str]): Only count the todos that belong to this user.
+    """
+    if not todo_ids:
+        return
+    columns = todo_bucket_columns()
+    query = select(*columns, func.count() * delta).filter(Todo.id.in_(todo_ids))
+    if user_id is not None:
+        query = query.filter(Todo.user_id == user_id)
+    insert = _INSERTS[db.bind.dialect.name]
+    # Grouped, so each bucket is upserted at most once per statement
+    stmt = insert(UserStats).from_select(BUCKET_KEY + ["todo_count"], query.group_by(*columns))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=BUCKET_KEY,
+        set_={"todo_count": UserStats.todo_count + stmt.excluded.todo_count}
+    )
+    await db.execute(stmt)
+
+async def get_productivity_stats(db: AsyncSession, user_id: str) -> dict:
+    """
+    Read a user's todo counts from their materialized UserStats buckets.
+
+    Pending todos due before today are overdue by bucket alone; those due
+    earlier today are counted with a small index range query on todos.
+
+    Args:
+        db (AsyncSession): The database session.
+        user_id (str): The ID of the user.
+
+    Returns:
+        dict: Total, completed, overdue and pending counts, a `by_priority`
+        breakdown and the `completion_history` of the last COMPLETION_HISTORY_DAYS days.
+    """
+    now = datetime.now()
+    today = now.date()
+    history_start = today - timedelta(days=COMPLETION_HISTORY_DAYS)
+
+    buckets = await db.execute(
+        select(UserStats.priority, UserStats.completed, UserStats.day, UserStats.todo_count)
+        .filter(UserStats.user_id == user_id, UserStats.todo_count != 0)
+    )
+    due_today = await db.execute(
+        select(func.coalesce(Todo.priority, NO_PRIORITY), func.count())
+        .filter(
+            Todo.user_id == user_id,
+            Todo.completed == False,
+            Todo.due_date >= datetime.combine(today, time.min),
+            Todo.due_date < now
+        )
+        .group_by(Todo.priority)
+    )
+
+    by_priority: dict = {}
+    history: dict = {}
+
+    def bucket(priority: int) -> dict:
+        return by_priority.setdefault(priority, {
+            "priority": None if priority == NO_PRIORITY else priority, "total": 0, "completed": 0, "overdue": 0
+        })
+
+    for priority, completed, day, count in buckets.all():
+        bucket(priority)["total"] += count
+        if completed:
+            bucket(priority)["completed"] += count
+            if day >= history_start:
+                history[day.isoformat()] = history.get(day.isoformat(), 0) + count
+        elif day < today:
+            bucket(priority)["overdue"] += count
+    for priority, count in due_today.all():
+        bucket(priority)["overdue"] += count
+
+    total_tasks = sum(b["total"] for b in by_priority.values())
+    completed_tasks = sum(b["completed"] for b in by_priority.values())
+    return {
+        "total_tasks": total_tasks,
+        "completed_tasks": completed_tasks,
+        "overdue_tasks": sum(b["overdue"] for b in by_priority.values()),
+        "pending_tasks": total_tasks - completed_tasks,
+        "by_priority": [by_priority[p] for p in sorted(by_priority, key=lambda p: (p == NO_PRIORITY, p))],
+        "completion_history": [
+            {"date": day, "completed_count": count} for day, count in sorted(history.items())
+        ],
+    }
+
+async def rebuild_user_stats(db: AsyncSession, user_id: Optional[str] = None, dry_run: bool = False) -> dict:
+    """
+    Recompute UserStats buckets from the todos table.
+
+    Args:
+        db (AsyncSession): The database session.
+        user_id (Optional[str]): Only rebuild this user's buckets. All users when None.
+        dry_run (bool): Only report drift, leave the stored buckets untouched.
+
+    Returns:
+        dict: The drifted buckets, mapping (user_id, priority, completed, day)
+        to (stored count, recomputed count).
+    """
+    columns = todo_bucket_columns()
+    computed_query = select(*columns, func.count()).group_by(*columns)
+    stored_query = select(
+        UserStats.user_id, UserStats.priority, UserStats.completed, UserStats.day, UserStats.todo_count
+    ).filter(UserStats.todo_count != 0)
+    if user_id is not None:
+        computed_query = computed_query.filter(Todo.user_id == user_id)
+        stored_query = stored_query.filter(UserStats.user_id == user_id)
+
+    computed = {tuple(row[:4]): row[4] for row in (await db.execute(computed_query)).all()}
+    stored = {tuple(row[:4]): row[4] for row in (await db.execute(stored_query)).all()}
+    drift = {
+        key: (stored.get(key, 0), computed.get(key, 0))
+        for key in computed.keys() | stored.keys()
+        if stored.get(key, 0) != computed.get(key, 0)
+    }
+
+    if not dry_run:
+        clear = delete(UserStats)
+        if user_id is not None:
+            clear = clear.filter(UserStats.user_id == user_id)
+        await db.execute(clear)
+        await db.execute(
+            _INSERTS[db.bind.dialect.name](UserStats).from_select(BUCKET_KEY + ["todo_count"], computed_query)
+        )
+        await db.commit()
+    return drift
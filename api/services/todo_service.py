@@ -1,144 +1,450 @@
+import csv
+import io
 import json
-from typing import Optional, List
-from openai import OpenAI
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import AsyncIterator, Optional, List, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import Boolean, Select, String, cast, delete, insert, select, update
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.ext.asyncio import AsyncSession
 from api.core.settings import settings
+from api.database.database import ReadSessionLocal
 from api.models.model import Todo
-from api.schemas.todo import TodoCreate, TodoUpdate
-from datetime import datetime
+from api.schemas.todo import TodoBatchOperation, TodoCreate, TodoResponse, TodoUpdate
+from api.services.change_service import CHANGE_CREATE, CHANGE_DELETE, CHANGE_UPDATE, publish_changes, record_todo_changes
+from api.services.embedding_service import index_todos, unindex_todos
+from api.services.llm_gateway import LLMUnavailableError, create_gateway
+from api.services.nlp_service import extract_title
+from api.services.stats_service import get_productivity_stats, record_todo_stats, record_todos_stats
+from api.utils.batching import MicroBatcher
+from api.utils.cache import content_hash, create_cache
+from api.utils.metrics import track_batcher, track_cache
+from api.utils.pagination import after_cursor
+
+llm = create_gateway()
+
+# Rows fetched per round trip by the export cursor, and written out per chunk
+EXPORT_BATCH_SIZE = 1000
+
+# Suggestions keyed by a hash of the prompt, so unchanged stats skip the LLM call
+suggestion_cache = create_cache(
+    settings.SUGGESTION_CACHE_BACKEND,
+    maxsize=settings.SUGGESTION_CACHE_SIZE,
+    ttl=settings.SUGGESTION_CACHE_TTL,
+    path=settings.SUGGESTION_CACHE_PATH
+)
+track_cache("suggestions", suggestion_cache)
+
+def new_todo_values(todo: TodoCreate, user_id: str) -> dict:
+    """
+    Column values inserting `todo` for a user.
 
-client = OpenAI(api_key = settings.OPENAI_API_KEY)
+    A missing due date is left out rather than passed as None, so the
+    column's default (now) still applies, as it does for an ORM insert.
+    """
+    values = {"content": todo.content, "user_id": user_id, "title": todo.title, "priority": todo.priority}
+    if todo.due_date is not None:
+        values["due_date"] = todo.due_date
+    return values
 
-def create_todo(db: Session, todo: TodoCreate, user_id: str) -> Todo:
+async def create_todo(db: AsyncSession, todo: TodoCreate, user_id: str) -> Todo:
     """
     Create a new todo item in the database.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         todo (TodoCreate): The todo data to create.
         user_id (str): The ID of the user creating the todo.
 
     Returns:
         Todo: The created todo object.
     """
-    db_todo = Todo(content=todo.content, user_id=user_id, title=todo.title, priority=todo.priority, due_date=todo.due_date)
-    db.add(db_todo)
-    db.commit()
-    db.refresh(db_todo)
+    result = await db.execute(
+        insert(Todo)
+        .values(**new_todo_values(todo, user_id))
+        .returning(Todo)
+    )
+    db_todo = result.scalars().one()
+    await record_todo_stats(db, db_todo.id, 1)
+    await index_todos(db, [db_todo])
+    await record_todo_changes(db, user_id, [(db_todo.id, CHANGE_CREATE)])
+    await db.commit()
+    publish_changes(user_id)
     return db_todo
 
-def get_todo(db: Session, todo_id: str) -> Optional[Todo]:
+async def get_todo(db: AsyncSession, todo_id: str) -> Optional[Todo]:
     """
     Retrieve a todo item by its ID.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         todo_id (str): The ID of the todo item.
 
     Returns:
         Optional[Todo]: The todo object if found, otherwise None.
     """
-    return db.query(Todo).filter(Todo.id == todo_id).first()
+    result = await db.execute(select(Todo).filter(Todo.id == todo_id))
+    return result.scalars().first()
+
+# Sort orders of todo listings, each ending in the (created_at, id) order keyset cursors follow
+TODO_SORTS = {
+    "created_at": (Todo.created_at, Todo.id),
+    "due_date": (Todo.due_date, Todo.created_at, Todo.id),
+    "priority": (Todo.priority, Todo.created_at, Todo.id),
+}
+
+class unlikely(FunctionElement):
+    """
+    A condition the query planner should take as selective.
+
+    Renders as SQLite's unlikely(); other databases get the bare condition.
+    """
+    type = Boolean()
+    name = "unlikely"
+    inherit_cache = True
+    # Already a condition, so SQLite must not compare it with 1
+    _is_implicitly_boolean = True
+
+@compiles(unlikely)
+def _compile_unlikely(element, compiler, **kw):
+    return compiler.process(element.clauses, **kw)
+
+@compiles(unlikely, "sqlite")
+def _compile_unlikely_sqlite(element, compiler, **kw):
+    return f"unlikely({compiler.process(element.clauses, **kw)})"
+
+def build_todo_query(
+    user_id: Optional[str] = None,
+    completed: Optional[bool] = None,
+    priorities: Optional[List[int]] = None,
+    due_before: Optional[datetime] = None,
+    due_after: Optional[datetime] = None,
+    sort: str = "created_at"
+) -> Select:
+    """
+    Build a filtered, sorted todo listing query.
+
+    Every filter is a plain comparison on an indexed column, so that each
+    combination can be answered from an index (see the todos indexes and
+    test_todo_filters_use_indexes).
+
+    Args:
+        user_id (Optional[str]): Only todos owned by this user.
+        completed (Optional[bool]): Only completed or only pending todos.
+        priorities (Optional[List[int]]): Only todos with one of these priorities.
+        due_before (Optional[datetime]): Only todos due before this time.
+        due_after (Optional[datetime]): Only todos due at or after this time.
+        sort (str): One of TODO_SORTS.
+
+    Returns:
+        Select: The query, without offset or limit.
+    """
+    query = select(Todo)
+    if user_id is not None:
+        query = query.filter(Todo.user_id == user_id)
+    if completed is not None:
+        query = query.filter(Todo.completed == completed)
+    if priorities:
+        query = query.filter(Todo.priority.in_(priorities))
+    # Due-date windows are usually narrow (overdue, due this week). Without
+    # table statistics SQLite would rather walk a whole sort index than
+    # search ix_todos_due_date and sort the few matches.
+    if due_before is not None:
+        query = query.filter(unlikely(Todo.due_date < due_before))
+    if due_after is not None:
+        query = query.filter(unlikely(Todo.due_date >= due_after))
+    return query.order_by(*TODO_SORTS[sort])
+
+async def get_todo_with_version(db: AsyncSession, todo_id: str) -> Optional[Tuple[Todo, str]]:
+    """
+    Retrieve a todo item with its `updated_at` as stored, for `update_todo(expected_version=...)`.
+
+    The stored text is compared rather than a parsed datetime, which may not
+    round-trip to the same string.
+    """
+    result = await db.execute(select(Todo, cast(Todo.updated_at, String).label("version")).filter(Todo.id == todo_id))
+    row = result.first()
+    return None if row is None else (row.Todo, row.version)
 
-def get_todos(db: Session, skip: int = 0, limit: int = 100) -> List[Todo]:
+async def get_todos(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, sort: str = "created_at", **filters) -> List[Todo]:
     """
-    Retrieve a list of todo items from the database.
+    Retrieve a filtered list of todo items from the database.
 
     Args:
-        db (Session): The database session.
-        skip (int): The number of records to skip.
+        db (AsyncSession): The database session.
+        skip (int): The number of records to skip. Ignored when a cursor is given.
         limit (int): The maximum number of records to retrieve.
+        cursor (Optional[str]): Opaque cursor of the last record of the previous page.
+        sort (str): One of TODO_SORTS. Cursors only work with "created_at".
+        **filters: Filters accepted by `build_todo_query`.
 
     Returns:
         List[Todo]: A list of todo objects.
+
+    Raises:
+        HTTPException: If a cursor is combined with another sort order.
     """
-    return db.query(Todo).offset(skip).limit(limit).all()
+    query = build_todo_query(sort=sort, **filters)
+    if cursor:
+        if sort != "created_at":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor pagination requires sort=created_at"
+            )
+        query = query.filter(after_cursor(Todo, cursor))
+    else:
+        query = query.offset(skip)
+    result = await db.execute(query.limit(limit))
+    return list(result.scalars().all())
+
+async def export_todos(user_id: str, format: str = "ndjson") -> AsyncIterator[str]:
+    """
+    Stream all of a user's todos in (created_at, id) order as NDJSON or CSV.
+
+    Rows come from a server-side cursor EXPORT_BATCH_SIZE at a time and are
+    written out one batch per chunk, so memory use does not grow with the
+    number of todos. The generator opens its own session because it runs
+    after the request's dependencies have been closed.
 
-def update_todo(db: Session, todo_id: str, todo: TodoUpdate, user_id: str) -> Optional[Todo]:
+    Args:
+        user_id (str): The ID of the user whose todos to export.
+        format (str): "ndjson" for one JSON object per line, or "csv" with a header row.
+
+    Yields:
+        str: Chunks of the serialized export.
+    """
+    fields = list(TodoResponse.model_fields)
+    if format == "csv":
+        yield ",".join(fields) + "\r\n"
+    query = (
+        select(*(getattr(Todo, field) for field in fields))
+        .filter(Todo.user_id == user_id)
+        .order_by(Todo.created_at, Todo.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    async with ReadSessionLocal() as db:
+        result = await db.stream(query)
+        async for rows in result.mappings().partitions():
+            records = [TodoResponse.model_validate(row).model_dump(mode="json") for row in rows]
+            if format == "csv":
+                buffer = io.StringIO()
+                csv.DictWriter(buffer, fieldnames=fields).writerows(records)
+                yield buffer.getvalue()
+            else:
+                yield "".join(json.dumps(record) + "\n" for record in records)
+
+async def update_todo(db: AsyncSession, todo_id: str, todo: TodoUpdate, user_id: str, expected_version: Optional[str] = None) -> Optional[Todo]:
     """
     Update an existing todo item in the database.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         todo_id (str): The ID of the todo item to update.
         todo (TodoUpdate): The updated todo data.
         user_id (str): The ID of the user attempting to update the todo.
+        expected_version (Optional[str]): Only update if `updated_at` is still
+            this value, as returned by `get_todo_with_version`.
 
     Returns:
-        Optional[Todo]: The updated todo object if found and authorized, otherwise None.
-    """
-    db_todo = db.query(Todo).filter(Todo.id == todo_id).first()
-    if db_todo and str(db_todo.user_id) == user_id:
-        if db_todo:
-            for var, value in todo.model_dump(exclude_unset=True).items():
-                setattr(db_todo, var, value)
-        db.commit()
-        db.refresh(db_todo)
+        Optional[Todo]: The updated todo object if found, authorized and at the
+        expected version, otherwise None.
+    """
+    changes = todo.model_dump(exclude_unset=True)
+    conditions = [Todo.id == todo_id, Todo.user_id == user_id]
+    if expected_version is not None:
+        conditions.append(cast(Todo.updated_at, String) == expected_version)
+    if not changes:
+        result = await db.execute(select(Todo).filter(*conditions))
+        return result.scalars().first()
+    # Both statements match on (id, user_id), so a foreign todo is left alone
+    await record_todo_stats(db, todo_id, -1, user_id=user_id)
+    result = await db.execute(update(Todo).filter(*conditions).values(**changes).returning(Todo))
+    db_todo = result.scalars().first()
+    if db_todo is None:
+        await db.rollback()
+        return None
+    await record_todo_stats(db, todo_id, 1)
+    if "title" in changes or "content" in changes:
+        await index_todos(db, [db_todo])
+    await record_todo_changes(db, user_id, [(todo_id, CHANGE_UPDATE)])
+    await db.commit()
+    publish_changes(user_id)
     return db_todo
 
-def delete_todo(db: Session, todo_id: str, user_id: str) -> bool:
+async def delete_todo(db: AsyncSession, todo_id: str, user_id: str) -> bool:
     """
     Delete a todo item from the database.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         todo_id (str): The ID of the todo item to delete.
         user_id (str): The ID of the user attempting to delete the todo.
 
     Returns:
         bool: True if the todo item was deleted and authorized, False otherwise.
     """
-    db_todo = db.query(Todo).filter(Todo.id == todo_id).first()
-    if db_todo and str(db_todo.user_id) == user_id:
-        db.delete(db_todo)
-        db.commit()
-        return True
-    return False
+    await record_todo_stats(db, todo_id, -1, user_id=user_id)
+    result = await db.execute(delete(Todo).filter(Todo.id == todo_id, Todo.user_id == user_id))
+    if result.rowcount == 0:
+        await db.rollback()
+        return False
+    await unindex_todos(db, [todo_id], user_id)
+    await record_todo_changes(db, user_id, [(todo_id, CHANGE_DELETE)])
+    await db.commit()
+    publish_changes(user_id)
+    return True
+
+
+async def apply_todo_batch(db: AsyncSession, operations: List[TodoBatchOperation], user_id: str) -> List[dict]:
+    """
+    Apply a mixed list of create/update/delete operations in one transaction.
 
+    Operations take effect in list order, but are executed as one bulk
+    statement per kind: a multi-row INSERT, an executemany UPDATE per set of
+    changed fields and a single DELETE. Updates and deletes of todos that do
+    not exist, belong to another user or were deleted earlier in the batch
+    get a 404 result and leave the rest of the batch untouched.
 
-def analyze_productivity(db: Session) -> dict:
+    Args:
+        db (AsyncSession): The database session.
+        operations (List[TodoBatchOperation]): The operations to apply.
+        user_id (str): The ID of the user applying the batch.
+
+    Returns:
+        List[dict]: One result per operation, in order, with its `op`, todo
+        `id`, HTTP-style `status` and the resulting `todo` or an `error`.
+    """
+    target_ids = {op.id for op in operations if op.op != "create"}
+    owned = set()
+    if target_ids:
+        result = await db.execute(select(Todo.id).filter(Todo.id.in_(target_ids), Todo.user_id == user_id))
+        owned = set(result.scalars().all())
+
+    results: List[dict] = []
+    creates: List[tuple] = []
+    changes: dict = {}
+    deleted: set = set()
+    for op in operations:
+        if op.op == "create":
+            creates.append((len(results), op.todo))
+            results.append({"op": op.op, "status": 201})
+        elif op.id not in owned or op.id in deleted:
+            results.append({"op": op.op, "id": op.id, "status": 404, "error": "Todo not found"})
+        elif op.op == "update":
+            changes.setdefault(op.id, {}).update(op.todo.model_dump(exclude_unset=True))
+            results.append({"op": op.op, "id": op.id, "status": 200})
+        else:
+            changes.pop(op.id, None)
+            deleted.add(op.id)
+            results.append({"op": op.op, "id": op.id, "status": 200})
+
+    # Take the touched todos out of their buckets before they change
+    await record_todos_stats(db, list(changes) + list(deleted), -1)
+
+    # Todos without a due date leave the column out to get its default, and
+    # executemany needs the same columns in every row, so group the inserts too
+    create_groups: dict = {}
+    for index, todo in creates:
+        values = new_todo_values(todo, user_id)
+        create_groups.setdefault(tuple(sorted(values)), []).append((index, values))
+    created: List[Todo] = []
+    for group in create_groups.values():
+        rows = await db.execute(
+            insert(Todo).returning(Todo, sort_by_parameter_order=True),
+            [values for _, values in group]
+        )
+        for (index, _), db_todo in zip(group, rows.scalars().all()):
+            results[index].update(id=db_todo.id, todo=db_todo)
+            created.append(db_todo)
+
+    # executemany needs the same columns in every row, so group updates by changed fields
+    update_groups: dict = {}
+    for todo_id, values in changes.items():
+        if values:
+            update_groups.setdefault(tuple(sorted(values)), []).append({"id": todo_id, **values})
+    for rows in update_groups.values():
+        await db.execute(update(Todo), rows)
+
+    if deleted:
+        await db.execute(delete(Todo).filter(Todo.id.in_(deleted)))
+        await unindex_todos(db, deleted, user_id)
+    await record_todos_stats(db, list(changes) + [db_todo.id for db_todo in created], 1)
+
+    # executemany UPDATE cannot return rows, so read the updated todos back in one query
+    todos: dict = {}
+    if changes:
+        todos = {todo.id: todo for todo in (await db.execute(select(Todo).filter(Todo.id.in_(changes)))).scalars()}
+        for result in results:
+            if result["op"] == "update" and result["id"] in todos:
+                result["todo"] = todos[result["id"]]
+    await index_todos(db, created + [
+        todos[todo_id] for todo_id, values in changes.items()
+        if todo_id in todos and ("title" in values or "content" in values)
+    ])
+
+    # One change log entry per touched todo, naming what the batch did to it overall
+    logged: dict = {}
+    for result in results:
+        if result["status"] == 404 or result["id"] in logged:
+            continue
+        if result["op"] == "create":
+            logged[result["id"]] = CHANGE_CREATE
+        elif result["id"] in deleted:
+            logged[result["id"]] = CHANGE_DELETE
+        elif changes.get(result["id"]):
+            logged[result["id"]] = CHANGE_UPDATE
+    await record_todo_changes(db, user_id, list(logged.items()))
+    await db.commit()
+    if logged:
+        publish_changes(user_id)
+    return results
+
+
+async def analyze_productivity(db: AsyncSession, user_id: str) -> dict:
     """
-    Analyze task completion data to generate productivity reports.
+    Analyze a user's task completion data to generate productivity reports.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
+        user_id (str): The ID of the user to analyze.
 
     Returns:
         dict: A dictionary containing productivity metrics and insights.
     """
-    completed_tasks = db.query(Todo).filter(
-        Todo.completed == True
-    ).count()
-    total_tasks = db.query(Todo).count()
-    overdue_tasks = db.query(Todo).filter(
-        Todo.due_date < datetime.now(),
-        Todo.completed == False
-    ).count()
+    stats = await get_productivity_stats(db, user_id)
+    completed_tasks = stats["completed_tasks"]
+    total_tasks = stats["total_tasks"]
+    overdue_tasks = stats["overdue_tasks"]
 
     completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
-    insights = []
-
-    if completion_rate < 50:
-        insights.append("Consider prioritizing your tasks to improve completion rates.")
-    if overdue_tasks > 0:
-        insights.append(f"You have {overdue_tasks} overdue tasks. Try to complete them as soon as possible.")
 
     return {
-        "completed_tasks": completed_tasks,
-        "total_tasks": total_tasks,
-        "overdue_tasks": overdue_tasks,
+        **stats,
         "completion_rate": completion_rate,
-        "insights": insights,
-        "suggestions": generate_ai_suggestions({
+        "insights": build_insights(completion_rate, overdue_tasks),
+        "suggestions": await generate_ai_suggestions({
             "completion_rate": completion_rate,
             "overdue_tasks": overdue_tasks,
             "completed_tasks": completed_tasks,
+            "pending_tasks": stats["pending_tasks"],
+            "completion_history": stats["completion_history"],
         }),
     }
 
 
-def generate_ai_suggestions(data: dict) -> dict:
-    """Returns AI suggestions based on user todo behavior"""
+def build_insights(completion_rate: float, overdue_tasks: int) -> List[str]:
+    """Rule-based productivity insights, also used when the LLM is unavailable."""
+    insights = []
+    if completion_rate < 50:
+        insights.append("Consider prioritizing your tasks to improve completion rates.")
+    if overdue_tasks > 0:
+        insights.append(f"You have {overdue_tasks} overdue tasks. Try to complete them as soon as possible.")
+    return insights
+
+
+async def generate_ai_suggestions(data: dict) -> dict:
+    """Returns AI suggestions based on user todo behavior, or rule-based insights if the LLM is unavailable"""
     
     # Build system prompt
     system_prompt = (
@@ -163,52 +469,97 @@ def generate_ai_suggestions(data: dict) -> dict:
 
     user_prompt += "\nPlease provide tailored suggestions."
 
-    # Chat completion call
-    response = client.responses.create(
-        model="gpt-4o",
-        instructions=system_prompt,
-        input=user_prompt,
-        temperature=0.7
-    )
+    request = {
+        "model": "gpt-4o",
+        "instructions": system_prompt,
+        "input": user_prompt,
+        "temperature": 0.7
+    }
+    cache_key = content_hash(request)
+    cached = suggestion_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    try:
+        output = await llm.complete(**request)
+    except LLMUnavailableError:
+        # Fallback: rule-based insights, not cached so the LLM is retried next time
+        return {"suggestions": build_insights(data.get("completion_rate", 0), data.get("overdue_tasks", 0))}
 
-    output = response.output_text.strip()
     try:
         # Try to parse the output as JSON
         result = json.loads(output)
-        if isinstance(result, dict) and "suggestions" in result:
-            return result
-        # If not in expected format, fallback
-        return {"suggestions": result if isinstance(result, list) else [str(result)]}
+        if not (isinstance(result, dict) and "suggestions" in result):
+            # If not in expected format, fallback
+            result = {"suggestions": result if isinstance(result, list) else [str(result)]}
     except Exception:
         # Fallback: return the raw output as a single suggestion
-        return {"suggestions": [output]}
+        result = {"suggestions": [output]}
+    suggestion_cache.set(cache_key, result)
+    return result
+
+EXPAND_PROMPT = (
+    "You are a helpful assistant. Expand the following short todo/task description into a more detailed, actionable description. "
+    "Be clear and concise."
+)
+
+EXPAND_BATCH_PROMPT = (
+    "You are a helpful assistant. You will receive a JSON array of short todo/task descriptions. Expand each one into a more "
+    "detailed, actionable description. Be clear and concise. Return a JSON object in the following format: "
+    "{\"expansions\": [\"expansion 1\", \"expansion 2\"]}, with exactly one expansion per description, in the same order. "
+    "Do not include any text outside the JSON object."
+)
+
+async def expand_descriptions(descriptions: List[str]) -> List[str]:
+    """
+    Expand a batch of descriptions with a single LLM call.
 
-def expand_description(description: str) -> str:
+    Raises:
+        LLMUnavailableError: If the call fails or the response does not hold one expansion per description.
+    """
+    if len(descriptions) == 1:
+        return [await llm.complete(model="gpt-4o", instructions=EXPAND_PROMPT, input=descriptions[0], temperature=0.5)]
+
+    output = await llm.complete(model="gpt-4o", instructions=EXPAND_BATCH_PROMPT, input=json.dumps(descriptions), temperature=0.5)
+    try:
+        expansions = json.loads(output)["expansions"]
+    except (ValueError, TypeError, KeyError):
+        raise LLMUnavailableError("Malformed batch expansion response")
+    if not isinstance(expansions, list) or len(expansions) != len(descriptions):
+        raise LLMUnavailableError("Batch expansion response does not match the batch size")
+    return [str(expansion).strip() for expansion in expansions]
+
+# Concurrent expand_description calls arriving within the window share one LLM request
+expansion_batcher = MicroBatcher(
+    expand_descriptions,
+    window=settings.LLM_BATCH_WINDOW_MS / 1000,
+    max_size=settings.LLM_BATCH_MAX_SIZE
+)
+track_batcher("llm_expansions", expansion_batcher)
+
+async def expand_description(description: str) -> str:
     """
     Expand the input description using OpenAI or a simple fallback.
     """
     try:
-        system_prompt = (
-            "You are a helpful assistant. Expand the following short todo/task description into a more detailed, actionable description. "
-            "Be clear and concise."
-        )
-        response = client.responses.create(
-            model="gpt-4o",
-            instructions=system_prompt,
-            input=description,
-            temperature=0.5
-        )
-        return response.output_text.strip()
-    except Exception:
+        return await expansion_batcher.submit(description)
+    except LLMUnavailableError:
         # Fallback: just return the original description
         return description
 
 def generate_title_from_description(expanded: str) -> str:
     """
-    Generate a title from the expanded description (first sentence or up to 10 words).
+    Generate a title from the expanded description: its main verb and noun
+    phrase when spaCy is available, otherwise the first sentence or up to 10 words.
+
+    Parsing (and, on first use, loading the model) blocks, so async callers
+    run this in the threadpool.
     """
     if not expanded:
         return "Untitled Task"
+    title = extract_title(expanded)
+    if title:
+        return title
     # Use the first sentence or first 10 words as the title
     first_sentence = expanded.split(".")[0]
     words = first_sentence.split()
@@ -1,46 +1,49 @@
 from typing import Optional, List
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 from api.models.model import User
 from api.schemas.user import UserCreate, UserUpdate, UserLogin, TokenResponse, UserResponse
-from api.utils.dependencies import get_pass_hash, check_pass_hash, create_access_token, decode_token
+from api.utils.dependencies import get_pass_hash, check_pass_hash, password_hasher, create_access_token, decode_token, invalidate_user
+from api.utils.pagination import after_cursor
 
-def get_user_by_email(db: Session, email: str) -> Optional[User]:
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     """
     Retrieve a user by their email address.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         email (str): The email address of the user.
 
     Returns:
         Optional[User]: The user object if found, otherwise None.
     """
-    return db.query(User).filter(
-        or_(User.email == email)).first()
+    result = await db.execute(select(User).filter(
+        or_(User.email == email)))
+    return result.scalars().first()
 
-def get_user_by_username(db: Session, username: str) -> Optional[User]:
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
     """
     Retrieve a user by their username.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         username (str): The username of the user.
 
     Returns:
         Optional[User]: The user object if found, otherwise None.
     """
-    return db.query(User).filter(
-        or_(User.username == username)).first()
+    result = await db.execute(select(User).filter(
+        or_(User.username == username)))
+    return result.scalars().first()
 
-def create_user(db: Session, user: UserCreate) -> User:
+async def create_user(db: AsyncSession, user: UserCreate) -> User:
     """
     Create a new user in the database.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         user (UserCreate): The user data to create.
 
     Returns:
@@ -49,8 +52,8 @@ def create_user(db: Session, user: UserCreate) -> User:
     Raises:
         HTTPException: If the email or username is already registered.
     """
-    existing_email = get_user_by_email(db, user.email)
-    existing_username = get_user_by_username(db, user.username)
+    existing_email = await get_user_by_email(db, user.email)
+    existing_username = await get_user_by_username(db, user.username)
     if existing_email:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -62,106 +65,123 @@ def create_user(db: Session, user: UserCreate) -> User:
             detail="Username already registered"
         )
 
-    password = get_pass_hash(user.password)
-    db_user = User(
-        username=user.username,
-        password=password,
-        email=user.email,
-        name=user.name
+    password = await get_pass_hash(user.password)
+    result = await db.execute(
+        insert(User)
+        .values(username=user.username, password=password, email=user.email, name=user.name)
+        .returning(User)
     )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    db_user = result.scalars().one()
+    await db.commit()
     return db_user
 
-def get_user(db: Session, user_id: str) -> Optional[User]:
+async def get_user(db: AsyncSession, user_id: str) -> Optional[User]:
     """
     Retrieve a user by their ID.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         user_id (str): The ID of the user.
 
     Returns:
         Optional[User]: The user object if found, otherwise None.
     """
-    return db.query(User).filter(User.id == user_id).first()
+    result = await db.execute(select(User).filter(User.id == user_id))
+    return result.scalars().first()
 
-def get_users(db: Session, skip: int = 0, limit: int = 100) -> List[User]:
+async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[User]:
     """
-    Retrieve a list of users from the database.
+    Retrieve a list of users from the database in (created_at, id) order.
 
     Args:
-        db (Session): The database session.
-        skip (int): The number of records to skip.
+        db (AsyncSession): The database session.
+        skip (int): The number of records to skip. Ignored when a cursor is given.
         limit (int): The maximum number of records to retrieve.
+        cursor (Optional[str]): Opaque cursor of the last record of the previous page.
 
     Returns:
         List[User]: A list of user objects.
     """
-    return db.query(User).offset(skip).limit(limit).all()
-
-def update_user(db: Session, user_id: str, user: UserUpdate) -> Optional[User]:
+    query = select(User).order_by(User.created_at, User.id)
+    if cursor:
+        query = query.filter(after_cursor(User, cursor))
+    else:
+        query = query.offset(skip)
+    result = await db.execute(query.limit(limit))
+    return list(result.scalars().all())
+
+async def update_user(db: AsyncSession, user_id: str, user: UserUpdate) -> Optional[User]:
     """
     Update an existing user in the database.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         user_id (str): The ID of the user to update.
         user (UserUpdate): The updated user data.
 
     Returns:
         Optional[User]: The updated user object if found, otherwise None.
     """
-    db_user = db.query(User).filter(User.id == user_id).first()
+    result = await db.execute(update(User).filter(User.id == user_id).values(**vars(user)).returning(User))
+    db_user = result.scalars().first()
     if db_user:
-        for var, value in vars(user).items():
-            setattr(db_user, var, value)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        invalidate_user(user_id)
     return db_user
 
-def delete_user(db: Session, user_id: str) -> bool:
+async def delete_user(db: AsyncSession, user_id: str) -> bool:
     """
     Delete a user from the database.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         user_id (str): The ID of the user to delete.
 
     Returns:
         bool: True if the user was deleted, False otherwise.
     """
-    db_user = db.query(User).filter(User.id == user_id).first()
+    db_user = await get_user(db, user_id)
     if db_user:
-        db.delete(db_user)
-        db.commit()
+        await db.delete(db_user)
+        await db.commit()
+        invalidate_user(user_id)
         return True
     return False
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
     """
     Authenticates a user by checking their username and password.
 
+    If the stored hash was made with a different cost factor than the
+    configured one, the password is rehashed with the current one.
+
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         username (str): The username of the user.
         password (str): The plain-text password provided by the user.
 
     Returns:
         Optional[User]: The user object if authentication is successful, otherwise None.
     """
-    user = get_user_by_username(db, username)
-    if not user or not check_pass_hash(password, str(user.password)):
+    user = await get_user_by_username(db, username)
+    if not user or not await check_pass_hash(password, str(user.password)):
         return None
+    if password_hasher.needs_rehash(str(user.password)):
+        try:
+            user.password = await get_pass_hash(password)
+            await db.commit()
+            invalidate_user(str(user.id))
+        except HTTPException:
+            # Hashing pool is saturated; the login still succeeds, rehash next time
+            pass
     return user
 
-def login_user(db: Session, user_login: UserLogin) -> TokenResponse:
+async def login_user(db: AsyncSession, user_login: UserLogin) -> TokenResponse:
     """
     Logs in a user, authenticates them, and generates access and refresh tokens.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         user_login (UserLogin): The user login credentials.
 
     Returns:
@@ -170,7 +190,7 @@ def login_user(db: Session, user_login: UserLogin) -> TokenResponse:
     Raises:
         HTTPException: If authentication fails.
     """
-    user = authenticate_user(db, user_login.username, user_login.password)
+    user = await authenticate_user(db, user_login.username, user_login.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -195,12 +215,12 @@ def login_user(db: Session, user_login: UserLogin) -> TokenResponse:
         token_type="bearer"
     )
 
-def refresh_access_token(db: Session, refresh_token: str) -> TokenResponse:
+async def refresh_access_token(db: AsyncSession, refresh_token: str) -> TokenResponse:
     """
     Validates the refresh token and issues a new access token (and refresh token).
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         refresh_token (str): The refresh token.
 
     Returns:
@@ -211,7 +231,7 @@ def refresh_access_token(db: Session, refresh_token: str) -> TokenResponse:
     """
     try:
         user_id = decode_token(refresh_token)
-        user = get_user(db, user_id)
+        user = await get_user(db, user_id)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
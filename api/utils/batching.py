@@ -0,0 +1,66 @@
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional
+
+class MicroBatcher:
+    """
+    Coalesce concurrent calls into batches.
+
+    `submit` parks each item until `window` seconds have passed since the first
+    item of the batch or `max_size` items are waiting, then hands the whole
+    batch to `handler` in one call and fans its results (in the same order)
+    back out to the callers. If the handler raises, every caller of that batch
+    gets the exception.
+    """
+    def __init__(self, handler: Callable[[List[Any]], Awaitable[List[Any]]], window: float = 0.02, max_size: int = 16):
+        self.handler = handler
+        self.window = window
+        self.max_size = max_size
+        self.batches = 0
+        self.items = 0
+        self._pending: list = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: set = set()
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def stats(self) -> dict:
+        """Batch counters; `fill_ratio` is the mean batch size over `max_size`."""
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "fill_ratio": self.items / (self.batches * self.max_size) if self.batches else 0.0,
+        }
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: list) -> None:
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = await self.handler([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"Batch handler returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+def content_hash(data: Any) -> str:
+    """Return a stable SHA-256 hex digest of JSON-serializable data."""
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class Cache:
+    """
+    Base class for the TTL + LRU caches.
+
+    Subclasses implement `_get`, `_set`, `_delete` and `clear`; `get`/`set`
+    keep the hit/miss counters. The SQLite backend needs JSON-serializable values.
+    """
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            value = self._get(key, time.time())
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._set(key, value, time.time())
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._delete(key)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def _get(self, key: str, now: float) -> Optional[Any]:
+        raise NotImplementedError
+
+    def _set(self, key: str, value: Any, now: float) -> None:
+        raise NotImplementedError
+
+    def _delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+class NullCache(Cache):
+    """Cache that never stores anything."""
+    def _get(self, key, now):
+        return None
+
+    def _set(self, key, value, now):
+        pass
+
+    def _delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+class MemoryCache(Cache):
+    """In-process cache backed by an OrderedDict in LRU order."""
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600):
+        super().__init__(maxsize, ttl)
+        self._entries: OrderedDict = OrderedDict()
+
+    def _get(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _set(self, key, value, now):
+        self._entries[key] = (now + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _delete(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class SQLiteCache(Cache):
+    """Cache persisted in a SQLite file, shared across processes and restarts."""
+    def __init__(self, path: str, maxsize: int = 1024, ttl: float = 3600):
+        super().__init__(maxsize, ttl)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, used_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_used_at ON cache (used_at)")
+
+    def _get(self, key, now):
+        row = self._conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] <= now:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            return None
+        self._conn.execute("UPDATE cache SET used_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def _set(self, key, value, now):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at, used_at) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value), now + self.ttl, now)
+        )
+        self._conn.execute(
+            "DELETE FROM cache WHERE key IN ("
+            "SELECT key FROM cache ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+            (self.maxsize,)
+        )
+
+    def _delete(self, key):
+        self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+def create_cache(backend: str, maxsize: int, ttl: float, path: Optional[str] = None) -> Cache:
+    """
+    Build a cache from its settings.
+
+    Args:
+        backend (str): "memory", "sqlite" or "none".
+        maxsize (int): Maximum number of entries before LRU eviction.
+        ttl (float): Seconds an entry stays valid.
+        path (Optional[str]): SQLite file, required for the "sqlite" backend.
+
+    Returns:
+        Cache: The configured cache.
+    """
+    if backend == "memory":
+        return MemoryCache(maxsize, ttl)
+    if backend == "sqlite":
+        if not path:
+            raise ValueError("The sqlite cache backend needs a path")
+        return SQLiteCache(path, maxsize, ttl)
+    if backend == "none":
+        return NullCache(maxsize, ttl)
+    raise ValueError(f"Unknown cache backend: {backend}")
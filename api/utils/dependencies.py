@@ -3,14 +3,35 @@ from typing import Optional
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt, ExpiredSignatureError
 from datetime import datetime, timedelta, timezone
-from sqlalchemy.orm import Session
+import hashlib
+import time
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from api.database.database import init_db
 from api.models.model import User
 from api.core.settings import settings
-import bcrypt
+from api.utils.cache import MemoryCache
+from api.utils.metrics import track_cache
+from api.utils.passwords import PasswordHasher
 
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/login")
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="users/login", auto_error=False)
+
+# Verified token claims (keyed by token hash) and authenticated users (keyed by id),
+# so repeat requests skip both the JWT verification and the users lookup.
+# Invalidation is per process; the TTL bounds staleness across workers.
+token_cache = MemoryCache(maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL)
+principal_cache = MemoryCache(maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL)
+track_cache("auth_tokens", token_cache)
+track_cache("auth_users", principal_cache)
+
+# bcrypt runs on its own process pool so login bursts do not starve other requests
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    rounds=settings.PASSWORD_HASH_ROUNDS,
+)
 
 # Function to create a JWT token
 def create_access_token(data: dict, expires_delta: int = 10) -> str:
@@ -44,17 +65,47 @@ def decode_token(token: str) -> str:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-# Dependency to get current user from token
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(init_db)) -> User:
-    try:
+# Decode a JWT token, reusing the claims of tokens verified before
+def decode_token_cached(token: str) -> str:
+    key = hashlib.sha256(token.encode('utf-8')).hexdigest()
+    claims = token_cache.get(key)
+    if claims is None:
         user_id = decode_token(token)
-        user = db.query(User).filter(User.id == user_id).first()
+        claims = jwt.get_unverified_claims(token)
+        token_cache.set(key, {"sub": user_id, "exp": claims.get("exp")})
+        return user_id
+    if claims["exp"] is not None and claims["exp"] <= time.time():
+        token_cache.delete(key)
+        raise ValueError("Token has expired")
+    return claims["sub"]
+
+def invalidate_user(user_id: str) -> None:
+    """Drop a user from the authenticated-user cache after it changed."""
+    principal_cache.delete(user_id)
+
+def auth_cache_stats() -> dict:
+    """Hit/miss counters of the token and user caches."""
+    return {"tokens": token_cache.stats(), "users": principal_cache.stats()}
+
+# Dependency to get current user from token. The user is looked up on the primary,
+# not the read database: a replica may not have a user who just signed up yet.
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(init_db)) -> User:
+    try:
+        user_id = decode_token_cached(token)
+        user = principal_cache.get(user_id)
+        if user is not None:
+            return user
+        result = await db.execute(select(User).filter(User.id == user_id))
+        user = result.scalars().first()
         if user is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Could not validate credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+        # Detach it so the cached copy outlives this request's session
+        db.expunge(user)
+        principal_cache.set(user_id, user)
         return user
     except ValueError as e:
         # Handle token-related issues (e.g., expired or invalid token)
@@ -70,10 +121,25 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             detail=e.detail
         )
 
-def get_pass_hash(password: str) -> str:
-    """Hash a password using bcrypt."""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+# Dependency for routes that work anonymously but can use the current user
+async def get_optional_user(token: Optional[str] = Depends(oauth2_scheme_optional), db: AsyncSession = Depends(init_db)) -> Optional[User]:
+    if token is None:
+        return None
+    return await get_current_user(token, db)
+
+# Dependency for admin-only routes
+async def get_admin_user(current_user: User = Depends(get_current_user)) -> User:
+    if current_user.username not in settings.ADMIN_USERNAMES:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
+
+async def get_pass_hash(password: str) -> str:
+    """Hash a password using bcrypt with the configured cost factor."""
+    return await password_hasher.hash(password)
 
-def check_pass_hash(password: str, hashed_password: str) -> bool:
+async def check_pass_hash(password: str, hashed_password: str) -> bool:
     """Check a password against a hashed password."""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+    return await password_hasher.verify(password, hashed_password)
@@ -0,0 +1,53 @@
+import hashlib
+from typing import Optional, Sequence
+from fastapi import Request, Response, status
+
+def _etag(*parts) -> str:
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+def entity_etag(obj) -> str:
+    """Strong ETag of a row, which changes whenever its `updated_at` does."""
+    return _etag(obj.id, obj.updated_at.isoformat() if obj.updated_at else "")
+
+def collection_etag(items: Sequence) -> str:
+    """
+    ETag of a page of rows, from each row's id and `updated_at`.
+
+    Computed from the rows already fetched for the page, so it costs no extra
+    query. Unlike a count and max(updated_at), it also changes when a row is
+    swapped for an older one.
+    """
+    return _etag("collection", *(f"{item.id}@{item.updated_at.isoformat() if item.updated_at else ''}" for item in items))
+
+def etag_matches(header: Optional[str], etag: str, weak: bool = True) -> bool:
+    """
+    Whether an If-None-Match (`weak`) or If-Match header value lists `etag`.
+
+    Args:
+        header (Optional[str]): The header value: "*" or comma-separated ETags.
+        etag (str): The current ETag of the resource.
+        weak (bool): Ignore "W/" prefixes, as If-None-Match's weak comparison does.
+    """
+    if header is None:
+        return False
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if weak and candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Set the ETag header, and return a 304 response if the client's copy is current.
+
+    Routes return the 304 instead of their body, which skips serializing it.
+    """
+    response.headers["ETag"] = etag
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return None
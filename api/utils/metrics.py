@@ -0,0 +1,271 @@
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Sequence, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Response header with the time spent in the database, the LLM and the whole request
+SERVER_TIMING_HEADER = "Server-Timing"
+
+# Prometheus text exposition format
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def render(self) -> str:
+        return f"# HELP {self.name} {self.help}\n# TYPE {self.name} {self.kind}\n" + "".join(self._samples())
+
+    def _samples(self):
+        raise NotImplementedError
+
+class Counter(_Metric):
+    """Monotonic count per label set."""
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}\n"
+
+class Gauge(Counter):
+    """Value per label set that goes up and down."""
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+class Histogram(_Metric):
+    """Cumulative bucket counts, sum and count of observations per label set."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            # Per-bucket counts (the last one is +Inf), then the sum
+            counts = self._values.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            counts[-1] += value
+
+    def count(self, **labels) -> int:
+        counts = self._values.get(self._key(labels))
+        return sum(counts[:-1]) if counts else 0
+
+    def _samples(self):
+        for key, counts in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}\n"
+            yield f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(counts[-1])}\n"
+            yield f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}\n"
+
+class Collected(_Metric):
+    """
+    Metric whose samples are read when it is rendered, from counters kept elsewhere.
+
+    `collect` returns {label values: value}, the label values in the order of `labels`.
+    """
+    def __init__(self, name: str, help: str, labels: Sequence[str], kind: str, collect: Callable[[], Dict[Tuple[str, ...], float]]):
+        super().__init__(name, help, labels)
+        self.kind = kind
+        self._collect = collect
+
+    def _samples(self):
+        for key, value in sorted(self._collect().items()):
+            yield f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}\n"
+
+class Registry:
+    """The metrics of this process, rendered together by `render`."""
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "".join(metric.render() for metric in self._metrics.values())
+
+registry = Registry()
+
+http_requests = registry.register(Counter("http_requests_total", "HTTP requests by route and status.", ["method", "route", "status"]))
+http_request_duration = registry.register(Histogram("http_request_duration_seconds", "HTTP request latency.", ["method", "route"]))
+http_requests_in_flight = registry.register(Gauge("http_requests_in_flight", "HTTP requests being handled."))
+http_response_size = registry.register(Histogram("http_response_size_bytes", "HTTP response body size.", ["method", "route"], buckets=SIZE_BUCKETS))
+db_queries_per_request = registry.register(Histogram("db_queries_per_request", "SQL statements per HTTP request.", ["method", "route"], buckets=QUERY_COUNT_BUCKETS))
+db_query_duration = registry.register(Histogram("db_query_duration_seconds", "SQL statement latency."))
+llm_call_duration = registry.register(Histogram("llm_call_duration_seconds", "LLM call latency, including the wait for a slot.", ["outcome"]))
+
+# Caches reported by name, see track_cache
+caches: Dict[str, object] = {}
+
+def track_cache(name: str, cache) -> None:
+    """Report a Cache's hit and miss counters and hit rate, labelled cache=<name>."""
+    caches[name] = cache
+
+def _cache_stat(stat: str) -> Callable[[], Dict[Tuple[str, ...], float]]:
+    return lambda: {(name,): cache.stats()[stat] for name, cache in caches.items()}
+
+registry.register(Collected("cache_hits_total", "Cache lookups that found an entry.", ["cache"], "counter", _cache_stat("hits")))
+registry.register(Collected("cache_misses_total", "Cache lookups that found no entry.", ["cache"], "counter", _cache_stat("misses")))
+registry.register(Collected("cache_hit_ratio", "Share of cache lookups that found an entry.", ["cache"], "gauge", _cache_stat("hit_rate")))
+
+# Micro-batchers reported by name, see track_batcher
+batchers: Dict[str, object] = {}
+
+def track_batcher(name: str, batcher) -> None:
+    """Report a MicroBatcher's batch and item counters and fill ratio, labelled batcher=<name>."""
+    batchers[name] = batcher
+
+def _batcher_stat(stat: str) -> Callable[[], Dict[Tuple[str, ...], float]]:
+    return lambda: {(name,): batcher.stats()[stat] for name, batcher in batchers.items()}
+
+registry.register(Collected("batcher_batches_total", "Batches handed to the handler.", ["batcher"], "counter", _batcher_stat("batches")))
+registry.register(Collected("batcher_items_total", "Items submitted in those batches.", ["batcher"], "counter", _batcher_stat("items")))
+registry.register(Collected("batcher_fill_ratio", "Mean batch size over the maximum batch size.", ["batcher"], "gauge", _batcher_stat("fill_ratio")))
+
+@dataclass
+class RequestTimings:
+    """Database and LLM time spent on behalf of one request."""
+    db_queries: int = 0
+    db_seconds: float = 0.0
+    llm_calls: int = 0
+    llm_seconds: float = 0.0
+
+# Timings of the request being handled. Engine events fire in the
+# request's context too: SQLAlchemy runs them in a greenlet that shares it.
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("current_timings", default=None)
+
+def record_llm_call(seconds: float, success: bool) -> None:
+    """Record one LLM call, against the current request if any."""
+    llm_call_duration.observe(seconds, outcome="success" if success else "error")
+    timings = current_timings.get()
+    if timings is not None:
+        timings.llm_calls += 1
+        timings.llm_seconds += seconds
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement run on an engine (for an AsyncEngine, pass its `sync_engine`)."""
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("query_start")
+        if not starts:
+            return
+        seconds = time.perf_counter() - starts.pop()
+        db_query_duration.observe(seconds)
+        timings = current_timings.get()
+        if timings is not None:
+            timings.db_queries += 1
+            timings.db_seconds += seconds
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        # A failed statement never reaches after_cursor_execute
+        starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+        if starts:
+            starts.pop()
+
+def server_timing(timings: RequestTimings, total: float) -> str:
+    """Format a Server-Timing header value from a request's timings (all in ms)."""
+    return (
+        f'db;dur={timings.db_seconds * 1000:.1f};desc="{timings.db_queries} queries", '
+        f'llm;dur={timings.llm_seconds * 1000:.1f};desc="{timings.llm_calls} calls", '
+        f"total;dur={total * 1000:.1f}"
+    )
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route latency, response size and query count.
+
+    Routes are labelled by their path template (e.g. /todos/{todo_id}), so
+    the number of series stays bounded; unmatched paths share one label. Each
+    response gets a Server-Timing header with its database and LLM time, as
+    measured when the response starts (for streams, before the body is sent).
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                header = server_timing(timings, time.perf_counter() - start).encode("latin-1")
+                message["headers"] = list(message.get("headers", [])) + [(SERVER_TIMING_HEADER.lower().encode("latin-1"), header)]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            current_timings.reset(token)
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            labels = {"method": scope["method"], "route": getattr(route, "path", "unmatched")}
+            http_requests.inc(status=status, **labels)
+            http_request_duration.observe(time.perf_counter() - start, **labels)
+            http_response_size.observe(size, **labels)
+            db_queries_per_request.observe(timings.db_queries, **labels)
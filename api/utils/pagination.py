@@ -0,0 +1,52 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Sequence
+from fastapi import HTTPException, Response, status
+from sqlalchemy import and_, or_
+
+# Response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(created_at: datetime, id: str) -> str:
+    """Encode a (created_at, id) position as an opaque cursor."""
+    raw = json.dumps([created_at.isoformat(), id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Raises:
+        HTTPException: If the cursor is malformed.
+    """
+    try:
+        created_at, id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(created_at), str(id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def after_cursor(model, cursor: str):
+    """
+    Keyset predicate selecting rows of `model` after `cursor` in (created_at, id) order.
+
+    Written as a range on created_at plus a tie-break so it can be served by an
+    index on (created_at, id) instead of a scan.
+    """
+    created_at, id = decode_cursor(cursor)
+    return and_(
+        model.created_at >= created_at,
+        or_(model.created_at > created_at, model.id > id)
+    )
+
+def set_next_cursor(response: Response, items: Sequence, limit: int) -> Optional[str]:
+    """Set the next-page cursor header when a full page was returned."""
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    cursor = encode_cursor(last.created_at, str(last.id))
+    response.headers[NEXT_CURSOR_HEADER] = cursor
+    return cursor
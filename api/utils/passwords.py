@@ -0,0 +1,74 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Optional
+from fastapi import HTTPException, status
+import bcrypt
+
+def hash_password(password: str, rounds: int) -> str:
+    """Hash a password using bcrypt with the given cost factor."""
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+def check_password(password: str, hashed_password: str) -> bool:
+    """Check a password against a hashed password."""
+    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+def hash_rounds(hashed_password: str) -> Optional[int]:
+    """Return the cost factor of a bcrypt hash ("$2b$12$..." gives 12)."""
+    try:
+        return int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+class PasswordHasher:
+    """
+    Async bcrypt hashing on a dedicated process pool.
+
+    bcrypt is CPU-bound by design, so hashes run in `workers` separate
+    processes instead of competing with requests for the event loop. With
+    `workers=0` they run in the default thread pool instead. At most
+    `max_pending` operations may be queued or running; beyond that callers get
+    a 503 rather than an ever-growing backlog.
+    """
+    def __init__(self, workers: Optional[int] = None, max_pending: int = 64, rounds: int = 12):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self.pending = 0
+        self._executor: Optional[Executor] = None
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password, self.rounds)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(check_password, password, hashed_password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """Whether a hash was made with a different cost factor than the configured one."""
+        return hash_rounds(hashed_password) != self.rounds
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many password operations in progress, try again shortly",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.pending -= 1
+
+    def _get_executor(self) -> Optional[Executor]:
+        if self._executor is None and self.workers != 0:
+            # Spawned rather than forked: the parent runs threads (event loop, DB driver)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
@@ -0,0 +1,254 @@
+import marshal
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Deque, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from api.core.settings import settings
+
+# Seconds of samples kept by the sampler; the stacks of longer requests are cut short
+SAMPLE_WINDOW = 120.0
+
+# SQL statements recorded per request; later ones are dropped
+MAX_STATEMENTS = 500
+
+class StackSampler:
+    """
+    Background thread that records one thread's Python stack every `interval` seconds.
+
+    Samples go to a buffer covering the last `window` seconds, from which
+    `samples_between` picks those taken while a request ran. Only the
+    sampled thread's frames are walked, and the code objects are stored as
+    they are, so a sample costs a few microseconds of the GIL. A thread
+    running Python code only lets go of the GIL every switch interval (5 ms
+    by default), so each sample is weighted by the time since the previous one.
+    """
+    def __init__(self, interval: float = 0.005, window: float = SAMPLE_WINDOW):
+        self.interval = interval
+        self._samples: Deque[Tuple[float, tuple, float]] = deque(maxlen=max(1, int(window / interval)))
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._target: Optional[int] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self, thread_id: int) -> None:
+        """Start sampling the thread with this id (see threading.get_ident)."""
+        if self._thread is not None:
+            return
+        self._target = thread_id
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+
+    def samples_between(self, start: float, end: float) -> List[Tuple[tuple, float]]:
+        """(stack, seconds) of the samples taken between two `time.perf_counter` values, stacks root first."""
+        with self._lock:
+            samples = list(self._samples)
+        return [(stack, seconds) for taken, stack, seconds in samples if start <= taken <= end]
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stopped.wait(self.interval):
+            now = time.perf_counter()
+            # A long gap means the sampler itself was held up, not that the stack ran that long
+            seconds, last = min(now - last, self.interval * 10), now
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            del frame
+            if stack:
+                stack.reverse()
+                with self._lock:
+                    self._samples.append((now, tuple(stack), seconds))
+
+def _function(code) -> Tuple[str, int, str]:
+    """pstats key of a code object."""
+    return code.co_filename, code.co_firstlineno, code.co_name
+
+def to_collapsed(samples: List[Tuple[tuple, float]]) -> str:
+    """
+    Render stacks in the collapsed format read by flamegraph.pl and speedscope.
+
+    One line per distinct stack: frames from the root down, separated by
+    semicolons, then the number of samples.
+    """
+    counts: dict = {}
+    for stack, _ in samples:
+        counts[stack] = counts.get(stack, 0) + 1
+    lines = []
+    for stack, count in sorted(counts.items(), key=lambda item: -item[1]):
+        frames = ";".join(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})".replace(";", ",") for code in stack)
+        lines.append(f"{frames} {count}\n")
+    return "".join(lines)
+
+def to_pstats(samples: List[Tuple[tuple, float]]) -> bytes:
+    """
+    Build a file loadable with `pstats.Stats` from sampled stacks.
+
+    Each sample adds its seconds to the own time of its innermost function
+    and to the cumulative time of every function on the stack. Call counts
+    are sample counts, not real calls.
+    """
+    stats: dict = {}
+    for stack, seconds in samples:
+        functions = [_function(code) for code in stack]
+        seen = set()
+        for depth, function in enumerate(functions):
+            entry = stats.setdefault(function, [0, 0, 0.0, 0.0, {}])
+            leaf = depth == len(functions) - 1
+            # Recursive frames count once towards cumulative time
+            if function not in seen:
+                seen.add(function)
+                entry[0] += 1
+                entry[1] += 1
+                entry[3] += seconds
+            if leaf:
+                entry[2] += seconds
+            if depth > 0:
+                caller = entry[4].setdefault(functions[depth - 1], [0, 0, 0.0, 0.0])
+                caller[0] += 1
+                caller[1] += 1
+                caller[3] += seconds
+                if leaf:
+                    caller[2] += seconds
+    return marshal.dumps({
+        function: (cc, nc, tt, ct, {caller: tuple(values) for caller, values in callers.items()})
+        for function, (cc, nc, tt, ct, callers) in stats.items()
+    })
+
+@dataclass
+class Capture:
+    """A profiled request: its stack samples and the SQL it ran."""
+    method: str
+    path: str
+    status: int
+    duration_ms: float
+    reason: str
+    samples: List[Tuple[tuple, float]]
+    statements: List[dict]
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    captured_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+# SQL statements of the request being handled, while profiling is enabled
+current_statements: ContextVar[Optional[list]] = ContextVar("current_statements", default=None)
+
+class Profiler:
+    """
+    Opt-in request profiler: a stack sampler plus a bounded ring of captures.
+
+    Every request whose latency reaches `slow_ms` is captured, and so is a
+    random `sample_rate` fraction of the others. A capture holds the stacks
+    sampled from the event loop thread while the request ran, so requests
+    handled concurrently show up in it too, and the SQL statements the
+    request itself ran. The oldest captures are dropped past `max_captures`.
+    """
+    def __init__(self, sample_rate: float = 0.0, slow_ms: float = 1000.0, max_captures: int = 50, interval: float = 0.005):
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.sampler = StackSampler(interval)
+        self.captures: Deque[Capture] = deque(maxlen=max_captures)
+
+    def get(self, capture_id: str) -> Optional[Capture]:
+        for capture in self.captures:
+            if capture.id == capture_id:
+                return capture
+        return None
+
+    def should_capture(self, duration_ms: float) -> Optional[str]:
+        """Why a request of this latency is captured ("slow" or "sampled"), or None."""
+        if duration_ms >= self.slow_ms:
+            return "slow"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    def record_statements(self, engine: Engine) -> None:
+        """Record the statements run on an engine against the current request (for an AsyncEngine, pass its `sync_engine`)."""
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            starts = conn.info.get("profile_query_start")
+            if not starts:
+                return
+            duration_ms = (time.perf_counter() - starts.pop()) * 1000
+            statements = current_statements.get()
+            if statements is not None and len(statements) < MAX_STATEMENTS:
+                statements.append({"statement": statement, "duration_ms": duration_ms, "executemany": executemany})
+
+        @event.listens_for(engine, "handle_error")
+        def handle_error(exception_context):
+            starts = exception_context.connection.info.get("profile_query_start") if exception_context.connection else None
+            if starts:
+                starts.pop()
+
+# Only wired into the app when PROFILING_ENABLED is set
+profiler = Profiler(
+    sample_rate=settings.PROFILING_SAMPLE_RATE,
+    slow_ms=settings.PROFILING_SLOW_MS,
+    max_captures=settings.PROFILING_MAX_CAPTURES,
+    interval=settings.PROFILING_INTERVAL_MS / 1000
+)
+
+class ProfilingMiddleware:
+    """ASGI middleware handing each request's latency, stacks and SQL to a Profiler."""
+    def __init__(self, app, profiler: Profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        # The sampler follows the thread running the event loop
+        self.profiler.sampler.start(threading.get_ident())
+        statements: list = []
+        token = current_statements.set(statements)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            end = time.perf_counter()
+            current_statements.reset(token)
+            duration_ms = (end - start) * 1000
+            reason = self.profiler.should_capture(duration_ms)
+            if reason is not None:
+                self.profiler.captures.append(Capture(
+                    method=scope["method"],
+                    path=scope["path"],
+                    status=status,
+                    duration_ms=duration_ms,
+                    reason=reason,
+                    samples=self.profiler.sampler.samples_between(start, end),
+                    statements=statements,
+                ))
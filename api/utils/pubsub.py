@@ -0,0 +1,38 @@
+import asyncio
+from contextlib import contextmanager
+from typing import Dict, Hashable, Iterator, Set
+
+class PubSub:
+    """
+    In-process publish/subscribe of wake-up notifications, keyed by topic.
+
+    Each subscription is an asyncio.Event that `publish` sets. A burst of
+    publishes wakes a waiting subscriber once; the notification only says
+    that something changed, and subscribers read what changed from the
+    database. Publishes from other worker processes are not seen.
+    """
+    def __init__(self):
+        self._subscribers: Dict[Hashable, Set[asyncio.Event]] = {}
+
+    @contextmanager
+    def subscribe(self, topic: Hashable) -> Iterator[asyncio.Event]:
+        """Subscribe to a topic for the duration of the `with` block."""
+        event = asyncio.Event()
+        self._subscribers.setdefault(topic, set()).add(event)
+        try:
+            yield event
+        finally:
+            subscribers = self._subscribers.get(topic, set())
+            subscribers.discard(event)
+            if not subscribers:
+                self._subscribers.pop(topic, None)
+
+    def publish(self, topic: Hashable) -> int:
+        """Wake every subscriber of a topic, and return how many there are."""
+        subscribers = self._subscribers.get(topic, ())
+        for event in subscribers:
+            event.set()
+        return len(subscribers)
+
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
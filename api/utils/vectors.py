@@ -0,0 +1,106 @@
+from typing import Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale float32 rows to unit length, so a dot product is their cosine similarity."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+def to_blob(vector: np.ndarray) -> bytes:
+    """Serialize a vector as packed float32, 4 bytes per dimension."""
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+def from_blobs(blobs: Sequence[bytes], dim: int) -> np.ndarray:
+    """Deserialize `to_blob` output into an (n, dim) float32 matrix."""
+    return np.frombuffer(b"".join(blobs), dtype=np.float32).reshape(len(blobs), dim)
+
+class VectorIndex:
+    """
+    In-memory cosine similarity index with exact, batched top-k search.
+
+    Vectors are normalized on insert and kept in one preallocated float32
+    matrix that grows geometrically. Removing a vector moves the last row into
+    its slot, so `add` and `remove` cost O(dim) per vector and the live rows
+    always form a contiguous block for the search's matrix product.
+    """
+    def __init__(self, dim: int, capacity: int = 64):
+        self.dim = dim
+        self._matrix = np.empty((capacity, dim), dtype=np.float32)
+        self._ids: List[str] = []
+        self._positions: dict = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, id: str) -> bool:
+        return id in self._positions
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray) -> None:
+        """Insert vectors, replacing those of ids already in the index."""
+        vectors = normalize(np.asarray(vectors).reshape(len(ids), self.dim))
+        for id, vector in zip(ids, vectors):
+            position = self._positions.get(id)
+            if position is None:
+                position = len(self._ids)
+                if position == len(self._matrix):
+                    self._grow()
+                self._ids.append(id)
+                self._positions[id] = position
+            self._matrix[position] = vector
+
+    def remove(self, ids: Iterable[str]) -> None:
+        for id in ids:
+            position = self._positions.pop(id, None)
+            if position is None:
+                continue
+            last = len(self._ids) - 1
+            if position != last:
+                self._matrix[position] = self._matrix[last]
+                self._ids[position] = self._ids[last]
+                self._positions[self._ids[position]] = position
+            self._ids.pop()
+
+    def get(self, id: str) -> Optional[np.ndarray]:
+        position = self._positions.get(id)
+        return None if position is None else self._matrix[position].copy()
+
+    def search(self, queries: np.ndarray, k: int, exclude: Optional[Sequence[Optional[str]]] = None) -> List[List[Tuple[str, float]]]:
+        """
+        Return the `k` most similar ids to each query, best first, with their cosine similarity.
+
+        Args:
+            queries (np.ndarray): A (dim,) vector or an (n, dim) batch.
+            k (int): Results per query.
+            exclude (Optional[Sequence[Optional[str]]]): Per query, an id to leave
+                out of its results, typically the query's own.
+
+        Returns:
+            List[List[Tuple[str, float]]]: One (id, score) list per query.
+        """
+        queries = normalize(np.atleast_2d(queries))
+        size = len(self._ids)
+        if size == 0 or k <= 0:
+            return [[] for _ in queries]
+        scores = queries @ self._matrix[:size].T
+        if exclude is not None:
+            for row, id in enumerate(exclude):
+                if id in self._positions:
+                    scores[row, self._positions[id]] = -np.inf
+        k = min(k, size)
+        # argpartition finds the top k in O(size); only those k are sorted
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        results = []
+        for positions, row_scores in zip(np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)):
+            results.append([
+                (self._ids[position], float(score))
+                for position, score in zip(positions, row_scores) if score != -np.inf
+            ])
+        return results
+
+    def _grow(self) -> None:
+        grown = np.empty((max(1, len(self._matrix)) * 2, self.dim), dtype=np.float32)
+        grown[:len(self._matrix)] = self._matrix
+        self._matrix = grown
@@ -0,0 +1,258 @@
+"""
+Load-test the API hot paths in-process and compare the results with a baseline.
+
+Seeds a throwaway SQLite database with N users x M todos, then drives the
+real ASGI `app` from `main.py` through httpx, without a network hop. LLM calls
+go through the real gateway to a fake client that answers after
+`--llm-latency` ms. For each endpoint `--concurrency` clients send
+`--requests` requests between them. The script reports req/s and p50/p95/p99
+latency per endpoint. It also makes a separate, sequential pass of
+`--alloc-requests` requests under tracemalloc. That pass reports the memory
+allocated per request, as the mean rise in peak traced memory, and the
+memory still held once the pass is over, which hints at leaks or growing caches.
+
+Results can be written as JSON with `--output`. With `--baseline`, they are
+compared against an earlier run. The exit status is 1 when an endpoint's
+req/s fell, or its p95 rose, by more than `--tolerance`.
+
+Usage:
+    python -m benchmarks.api_load --users 50 --todos 200 --requests 500 --output results.json
+    python -m benchmarks.api_load --baseline results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+ENDPOINTS = ["login", "create", "list", "get", "update", "productivity", "nlp"]
+
+
+class FakeResponses:
+    """Stand-in for `AsyncOpenAI.responses`, answering each prompt kind after a fixed delay."""
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def create(self, instructions: str, input: str, **kwargs):
+        from api.services.todo_service import EXPAND_BATCH_PROMPT, EXPAND_PROMPT
+        await asyncio.sleep(self.latency)
+        if instructions == EXPAND_BATCH_PROMPT:
+            text = json.dumps({"expansions": [f"{description}, step by step" for description in json.loads(input)]})
+        elif instructions == EXPAND_PROMPT:
+            text = f"{input}, step by step"
+        else:
+            text = json.dumps({"suggestions": ["Finish overdue tasks first."]})
+        return SimpleNamespace(output_text=text)
+
+
+def seed(users: int, todos: int) -> list:
+    """Insert `users` users with `todos` todos each and return (user_id, username, todo_ids) tuples."""
+    from api.core.settings import settings
+    from api.database.database import Base, engine
+    from api.models.model import Todo, User
+    from api.utils.passwords import hash_password
+
+    Base.metadata.create_all(engine)
+    # One hash for everyone: seeding should not take users x bcrypt
+    password = hash_password("benchpassword", settings.PASSWORD_HASH_ROUNDS)
+    now = datetime.now()
+    seeded = []
+    with engine.begin() as conn:
+        for i in range(users):
+            user_id = str(uuid.uuid4())
+            conn.execute(User.__table__.insert(), [{
+                "id": user_id, "name": f"User {i}", "email": f"user{i}@example.com",
+                "username": f"user{i}", "password": password,
+            }])
+            rows = [
+                {
+                    "id": str(uuid.uuid4()),
+                    "user_id": user_id,
+                    "title": f"Todo {j}",
+                    "content": f"Seeded benchmark todo number {j}",
+                    "completed": random.random() < 0.5,
+                    "priority": random.randint(1, 3),
+                    "created_at": now - timedelta(minutes=random.randint(0, 525600)),
+                    "due_date": now + timedelta(days=random.randint(-30, 30)),
+                }
+                for j in range(todos)
+            ]
+            if rows:
+                conn.execute(Todo.__table__.insert(), rows)
+            seeded.append((user_id, f"user{i}", [row["id"] for row in rows]))
+    return seeded
+
+
+def requests_for(name: str, seeded: list, tokens: dict):
+    """Return a factory of (method, url, kwargs) for one request to an endpoint."""
+    def pick():
+        user_id, username, todo_ids = random.choice(seeded)
+        return user_id, username, todo_ids, {"Authorization": f"Bearer {tokens[user_id]}"}
+
+    def build():
+        user_id, username, todo_ids, headers = pick()
+        todo_id = random.choice(todo_ids) if todo_ids else "missing"
+        return {
+            "login": ("POST", "/users/login", {"json": {"username": username, "password": "benchpassword"}}),
+            "create": ("POST", "/todos/", {"json": {"title": "Load test", "content": "Created by the load test"}, "headers": headers}),
+            "list": ("GET", "/todos/", {"params": {"owner": "me", "limit": 50}, "headers": headers}),
+            "get": ("GET", f"/todos/{todo_id}", {}),
+            "update": ("PUT", f"/todos/{todo_id}", {"json": {"completed": random.random() < 0.5}, "headers": headers}),
+            "productivity": ("GET", "/todos/productivity/", {"headers": headers}),
+            "nlp": ("POST", "/todos/nlp/", {"params": {"description": "plan the team offsite"}, "headers": headers}),
+        }[name]
+    return build
+
+
+def percentile(samples: list, q: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+async def drive(client, build, requests: int, concurrency: int) -> dict:
+    """Send `requests` requests from `concurrency` clients and return throughput and latency percentiles."""
+    latencies, errors = [], 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            method, url, kwargs = build()
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+async def allocations(client, build, requests: int) -> dict:
+    """Memory allocated per request, measured one request at a time under tracemalloc."""
+    peaks = []
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    for _ in range(requests):
+        method, url, kwargs = build()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        await client.request(method, url, **kwargs)
+        peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "alloc_kb_per_request": statistics.mean(peaks) / 1024,
+        "retained_kb_per_request": (end - start) / requests / 1024,
+    }
+
+
+async def run(args) -> dict:
+    import httpx
+    from api.database.database import AsyncSessionLocal
+    from api.services import todo_service
+    from api.services.llm_gateway import LLMGateway
+    from api.services.stats_service import rebuild_user_stats
+    from api.utils.dependencies import create_access_token, password_hasher
+    from main import app
+
+    seeded = seed(args.users, args.todos)
+    async with AsyncSessionLocal() as db:
+        await rebuild_user_stats(db)
+    tokens = {user_id: create_access_token({"sub": user_id}, expires_delta=60) for user_id, _, _ in seeded}
+    todo_service.llm = LLMGateway(SimpleNamespace(responses=FakeResponses(args.llm_latency / 1000)))
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for name in args.endpoints:
+            build = requests_for(name, seeded, tokens)
+            # Warm up caches, connection pools and worker processes before timing
+            await drive(client, build, min(args.requests, args.concurrency * 2), args.concurrency)
+            results[name] = await drive(client, build, args.requests, args.concurrency)
+            if args.alloc_requests:
+                results[name].update(await allocations(client, build, args.alloc_requests))
+    password_hasher.shutdown()
+    return {
+        "config": {key: getattr(args, key) for key in ("users", "todos", "requests", "concurrency", "llm_latency")},
+        "endpoints": results,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Return a message per endpoint whose req/s or p95 regressed beyond `tolerance`."""
+    regressions = []
+    for name, current in results["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if previous is None:
+            continue
+        if current["rps"] < previous["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: {previous['rps']:.1f} -> {current['rps']:.1f} req/s")
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']:.2f} -> {current['p95_ms']:.2f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50, help="seeded users")
+    parser.add_argument("--todos", type=int, default=200, help="seeded todos per user")
+    parser.add_argument("--requests", type=int, default=500, help="timed requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--alloc-requests", type=int, default=50, help="requests per endpoint in the tracemalloc pass, 0 to skip it")
+    parser.add_argument("--llm-latency", type=float, default=50, help="fake LLM response time in ms")
+    parser.add_argument("--rounds", type=int, default=None, help="bcrypt cost factor (default: PASSWORD_HASH_ROUNDS)")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=ENDPOINTS, help="endpoints to load")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression against the baseline")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Settings and engines are built at import time, so point them at the throwaway database first
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        if args.rounds is not None:
+            os.environ["PASSWORD_HASH_ROUNDS"] = str(args.rounds)
+        results = asyncio.run(run(args))
+
+    for name, result in results["endpoints"].items():
+        line = (
+            f"{name:>12}: {result['rps']:8.1f} req/s, p50 {result['p50_ms']:7.2f} ms, "
+            f"p95 {result['p95_ms']:7.2f} ms, p99 {result['p99_ms']:7.2f} ms, {result['errors']} errors"
+        )
+        if "alloc_kb_per_request" in result:
+            line += f", {result['alloc_kb_per_request']:.0f} KB allocated/request"
+        print(line)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark login throughput and the latency of other requests during a login storm.
+
+Runs the app in-process against a throwaway SQLite database, once per hashing
+mode: bcrypt on the default thread pool (PASSWORD_HASH_WORKERS=0, like the old
+`run_in_threadpool` calls) and on the dedicated process pool. In each mode
+`--concurrency` clients log in as fast as they can for `--seconds`, while one
+client keeps reading a user. Reports logins per second, 503 rejections and the
+p50/p99 latency of the reads.
+
+Usage:
+    python -m benchmarks.password_hashing --concurrency 32 --seconds 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+async def storm(concurrency: int, seconds: float) -> dict:
+    """Run the login storm against the app and return the counters."""
+    import httpx
+    from api.database.database import Base, engine
+    from api.utils.dependencies import password_hasher
+    from main import app
+
+    Base.metadata.create_all(engine)
+    user = {"username": "benchuser", "email": "bench@example.com", "password": "benchpassword", "name": "Bench User"}
+    login = {"username": user["username"], "password": user["password"]}
+    logins, rejected, latencies = 0, 0, []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        user_id = (await client.post("/users/", json=user)).json()["id"]
+        await client.post("/users/login", json=login)  # starts the worker processes
+        deadline = time.perf_counter() + seconds
+
+        async def log_in():
+            nonlocal logins, rejected
+            while time.perf_counter() < deadline:
+                response = await client.post("/users/login", json=login)
+                if response.status_code == 200:
+                    logins += 1
+                elif response.status_code == 503:
+                    rejected += 1
+                    await asyncio.sleep(0.01)
+
+        async def read():
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                await client.get(f"/users/{user_id}")
+                latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(0.005)
+
+        await asyncio.gather(read(), *(log_in() for _ in range(concurrency)))
+    password_hasher.shutdown()
+    latencies.sort()
+    return {
+        "logins_per_second": logins / seconds,
+        "rejected": rejected,
+        "read_p50_ms": statistics.median(latencies) * 1000,
+        "read_p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+    }
+
+
+def measure(workers: str, args) -> dict:
+    """Run one mode in a fresh interpreter, since the hasher is configured at import time."""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            "PASSWORD_HASH_WORKERS": workers,
+            "PASSWORD_HASH_ROUNDS": str(args.rounds),
+        }
+        command = [sys.executable, "-m", "benchmarks.password_hashing", "--run",
+                   "--concurrency", str(args.concurrency), "--seconds", str(args.seconds)]
+        output = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent login clients")
+    parser.add_argument("--seconds", type=float, default=10, help="length of the storm")
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes in the hashing pool")
+    parser.add_argument("--run", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(asyncio.run(storm(args.concurrency, args.seconds))))
+        return
+
+    for label, workers in (("threads", "0"), ("processes", str(args.workers))):
+        result = measure(workers, args)
+        print(
+            f"{label:>10}: {result['logins_per_second']:.1f} logins/s, {result['rejected']} rejected, "
+            f"reads p50 {result['read_p50_ms']:.1f} ms / p99 {result['read_p99_ms']:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark top-k cosine search on the in-memory vector index at 100k and 1M vectors.
+
+Fills a VectorIndex with random unit vectors and reports the median latency
+of single-query and batched searches, and of incremental adds and removes.
+A 1M x 256 index takes about 1 GB of memory.
+
+Usage:
+    python -m benchmarks.similarity --sizes 100000 1000000 --dim 256
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from api.utils.vectors import VectorIndex
+
+
+def timed(fn, runs: int) -> float:
+    """Median wall time of `fn` in milliseconds."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def measure(size: int, dim: int, k: int, batch: int, runs: int) -> dict:
+    rng = np.random.default_rng(0)
+    index = VectorIndex(dim, capacity=size + runs)
+    chunk = 100_000
+    for start in range(0, size, chunk):
+        count = min(chunk, size - start)
+        index.add([str(i) for i in range(start, start + count)], rng.standard_normal((count, dim), dtype=np.float32))
+
+    single = rng.standard_normal(dim, dtype=np.float32)
+    queries = rng.standard_normal((batch, dim), dtype=np.float32)
+    fresh = iter(range(size, size + runs))
+    added = []
+
+    def add():
+        id = str(next(fresh))
+        index.add([id], single)
+        added.append(id)
+
+    return {
+        "query_ms": timed(lambda: index.search(single, k), runs),
+        "batch_ms": timed(lambda: index.search(queries, k), runs),
+        "add_ms": timed(add, runs),
+        "remove_ms": timed(lambda: index.remove([added.pop()]), runs),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=256, help="vector dimensions (256 for the hashing embedder)")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=64, help="queries per batched search")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        result = measure(size, args.dim, args.k, args.batch, args.runs)
+        print(
+            f"{size:>9} vectors: 1 query {result['query_ms']:.2f} ms, "
+            f"{args.batch} queries {result['batch_ms']:.2f} ms ({result['batch_ms'] / args.batch:.3f} ms each), "
+            f"add {result['add_ms'] * 1000:.1f} us, remove {result['remove_ms'] * 1000:.1f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
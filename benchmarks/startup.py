@@ -0,0 +1,53 @@
+"""
+Benchmark API startup time and memory with lazy vs preloaded spaCy.
+
+Imports `main` in fresh interpreters, once with the spaCy pipeline loaded on
+first use (the default) and once with NLP_PRELOAD=true, which matches the old
+import-time `spacy.load`. Reports the median import time and peak RSS.
+
+Usage:
+    python -m benchmarks.startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = (
+    "import json, resource, time\n"
+    "start = time.perf_counter()\n"
+    "import main\n"
+    "elapsed = time.perf_counter() - start\n"
+    "print(json.dumps({'seconds': elapsed, 'maxrss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))\n"
+)
+
+
+def measure(preload: bool, runs: int) -> dict:
+    """Import the app `runs` times in subprocesses and return median time and RSS."""
+    env = {**os.environ, "NLP_PRELOAD": "true" if preload else "false"}
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE], env=env, capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        "seconds": statistics.median(s["seconds"] for s in samples),
+        "maxrss_mb": statistics.median(s["maxrss_kb"] for s in samples) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="imports per mode")
+    args = parser.parse_args()
+
+    for label, preload in (("lazy", False), ("preload", True)):
+        result = measure(preload, args.runs)
+        print(f"{label:>8}: import main {result['seconds'] * 1000:.0f} ms, peak RSS {result['maxrss_mb']:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark the todo query patterns with and without the composite indexes.
+
+Seeds a throwaway SQLite database with N users x M todos, then prints the
+query plan and median latency of each query before and after the indexes
+declared on `Todo` exist.
+
+Usage:
+    python -m benchmarks.todo_indexes --users 100 --todos 10000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func, select
+
+from api.database.database import Base
+from api.models.model import Todo, User
+
+
+def seed(conn, users: int, todos: int) -> list[str]:
+    """Insert `users` users with `todos` todos each and return the user ids."""
+    user_ids = [str(uuid.uuid4()) for _ in range(users)]
+    conn.execute(User.__table__.insert(), [
+        {"id": user_id, "name": f"User {i}", "email": f"user{i}@example.com", "username": f"user{i}", "password": "x"}
+        for i, user_id in enumerate(user_ids)
+    ])
+    now = datetime.now()
+    for user_id in user_ids:
+        conn.execute(Todo.__table__.insert(), [
+            {
+                "id": str(uuid.uuid4()),
+                "user_id": user_id,
+                "title": f"Todo {i}",
+                "content": "Seeded benchmark todo",
+                "completed": random.random() < 0.5,
+                "priority": random.randint(1, 3),
+                "created_at": now - timedelta(minutes=random.randint(0, 525600)),
+                "due_date": now + timedelta(days=random.randint(-30, 30)),
+            }
+            for i in range(todos)
+        ])
+    return user_ids
+
+
+def queries(user_id: str) -> dict:
+    """The todo query patterns the API runs, keyed by name."""
+    now = datetime.now()
+    return {
+        "list by user": select(Todo).filter(Todo.user_id == user_id).order_by(Todo.created_at).limit(100),
+        "completed count": select(func.count()).select_from(Todo).filter(
+            Todo.user_id == user_id, Todo.completed == True
+        ),
+        "overdue count": select(func.count()).select_from(Todo).filter(
+            Todo.user_id == user_id, Todo.completed == False, Todo.due_date < now
+        ),
+    }
+
+
+def explain(conn, stmt) -> list[str]:
+    """Return SQLite's EXPLAIN QUERY PLAN for a statement."""
+    compiled = stmt.compile(dialect=conn.dialect)
+    params = [compiled.params[name] for name in compiled.positiontup]
+    params = [p.isoformat(" ") if isinstance(p, datetime) else p for p in params]
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", tuple(params)).all()
+    return [row[-1] for row in rows]
+
+
+def measure(conn, user_ids: list[str], runs: int) -> dict:
+    """Time each query against random users and capture its plan."""
+    results = {}
+    for name in queries(user_ids[0]):
+        timings = []
+        for _ in range(runs):
+            stmt = queries(random.choice(user_ids))[name]
+            start = time.perf_counter()
+            conn.execute(stmt).all()
+            timings.append(time.perf_counter() - start)
+        results[name] = {
+            "plan": explain(conn, queries(user_ids[0])[name]),
+            "median_ms": statistics.median(timings) * 1000,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--todos", type=int, default=1000, help="todos per user")
+    parser.add_argument("--runs", type=int, default=50, help="timed runs per query")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            user_ids = seed(conn, args.users, args.todos)
+
+            for index in Todo.__table__.indexes:
+                index.drop(conn)
+            before = measure(conn, user_ids, args.runs)
+
+            for index in Todo.__table__.indexes:
+                index.create(conn)
+            conn.exec_driver_sql("ANALYZE")
+            after = measure(conn, user_ids, args.runs)
+        engine.dispose()
+
+    print(f"{args.users} users x {args.todos} todos ({args.users * args.todos} rows)\n")
+    for name in before:
+        print(f"{name}: {before[name]['median_ms']:.3f} ms -> {after[name]['median_ms']:.3f} ms")
+        print(f"  before: {'; '.join(before[name]['plan'])}")
+        print(f"  after:  {'; '.join(after[name]['plan'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Benchmark the todo and user write paths: statements per call and median latency.
+
+Runs each service write against a throwaway SQLite database and counts the
+SQL statements it issues, next to the old load-modify-flush-refresh version
+of the same operation for comparison.
+
+Usage:
+    python -m benchmarks.write_paths --runs 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import uuid
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from api.database.database import Base
+from api.models.model import Todo, User
+from api.schemas.todo import TodoCreate, TodoUpdate
+from api.schemas.user import UserCreate, UserUpdate
+from api.services import todo_service, user_service
+from api.services.stats_service import record_todo_stats
+
+
+async def legacy_create_todo(db: AsyncSession, todo: TodoCreate, user_id: str) -> Todo:
+    db_todo = Todo(content=todo.content, user_id=user_id, title=todo.title, priority=todo.priority, due_date=todo.due_date)
+    db.add(db_todo)
+    await db.flush()
+    await record_todo_stats(db, db_todo.id, 1)
+    await db.commit()
+    await db.refresh(db_todo)
+    return db_todo
+
+
+async def legacy_update_todo(db: AsyncSession, todo_id: str, todo: TodoUpdate, user_id: str) -> Todo:
+    db_todo = (await db.execute(select(Todo).filter(Todo.id == todo_id))).scalars().first()
+    if db_todo and str(db_todo.user_id) == user_id:
+        await record_todo_stats(db, todo_id, -1)
+        for var, value in todo.model_dump(exclude_unset=True).items():
+            setattr(db_todo, var, value)
+        await db.flush()
+        await record_todo_stats(db, todo_id, 1)
+        await db.commit()
+        await db.refresh(db_todo)
+    return db_todo
+
+
+async def legacy_create_user(db: AsyncSession, user: UserCreate) -> User:
+    await user_service.get_user_by_email(db, user.email)
+    await user_service.get_user_by_username(db, user.username)
+    db_user = User(username=user.username, password=user.password, email=user.email, name=user.name)
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+
+async def legacy_update_user(db: AsyncSession, user_id: str, user: UserUpdate) -> User:
+    db_user = (await db.execute(select(User).filter(User.id == user_id))).scalars().first()
+    for var, value in vars(user).items():
+        setattr(db_user, var, value)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+
+async def new_user_create(db: AsyncSession, user: UserCreate) -> User:
+    # Skip the password hashing, which is not a database cost
+    original = user_service.get_pass_hash
+    async def plain(password):
+        return password
+    user_service.get_pass_hash = plain
+    try:
+        return await user_service.create_user(db, user)
+    finally:
+        user_service.get_pass_hash = original
+
+
+def operations(user_id: str, todo_id: str) -> dict:
+    """Operation name -> (old, new) coroutine factories taking a session."""
+    def new_user():
+        unique = uuid.uuid4().hex[:12]
+        return UserCreate(username=f"u{unique}", email=f"{unique}@example.com", password="benchpassword", name="Bench User")
+    todo = TodoCreate(title="Bench", content="Benchmark todo", priority=2)
+    change = TodoUpdate(title="Renamed", completed=True)
+    return {
+        "create_todo": (
+            lambda db: legacy_create_todo(db, todo, user_id),
+            lambda db: todo_service.create_todo(db, todo, user_id),
+        ),
+        "update_todo": (
+            lambda db: legacy_update_todo(db, todo_id, change, user_id),
+            lambda db: todo_service.update_todo(db, todo_id, change, user_id),
+        ),
+        "create_user": (
+            lambda db: legacy_create_user(db, new_user()),
+            lambda db: new_user_create(db, new_user()),
+        ),
+        "update_user": (
+            lambda db: legacy_update_user(db, user_id, UserUpdate(name="Renamed User")),
+            lambda db: user_service.update_user(db, user_id, UserUpdate(name="Renamed User")),
+        ),
+    }
+
+
+async def measure(sessions, counter: list, factory, runs: int) -> dict:
+    """Median latency and statements per call of one operation."""
+    timings, statements = [], []
+    for _ in range(runs):
+        async with sessions() as db:
+            counter[0] = 0
+            start = time.perf_counter()
+            await factory(db)
+            timings.append(time.perf_counter() - start)
+            statements.append(counter[0])
+    return {"median_ms": statistics.median(timings) * 1000, "statements": statistics.median(statements)}
+
+
+async def run(runs: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+        counter = [0]
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def count(*args):
+            counter[0] += 1
+
+        async with sessions() as db:
+            user = await new_user_create(db, UserCreate(
+                username="benchuser", email="bench@example.com", password="benchpassword", name="Bench User"
+            ))
+            todo = await todo_service.create_todo(db, TodoCreate(title="Bench", content="Benchmark todo"), user.id)
+
+        for name, (old, new) in operations(user.id, todo.id).items():
+            before = await measure(sessions, counter, old, runs)
+            after = await measure(sessions, counter, new, runs)
+            print(
+                f"{name}: {before['statements']:g} -> {after['statements']:g} statements, "
+                f"{before['median_ms']:.3f} ms -> {after['median_ms']:.3f} ms"
+            )
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=200, help="timed calls per operation")
+    args = parser.parse_args()
+    asyncio.run(run(args.runs))
+
+
+if __name__ == "__main__":
+    main()
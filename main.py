@@ -1,16 +1,35 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
 from fastapi.security import OAuth2PasswordBearer
 from api.router.user_router import router as user_router
 from api.router.todo_router import router as todo_router
-from fastapi.responses import JSONResponse
+from api.router.profile_router import router as profile_router
+from fastapi.responses import JSONResponse, Response
 from fastapi.exceptions import RequestValidationError
+from api.utils.pagination import NEXT_CURSOR_HEADER
+from api.services.embedding_service import DUPLICATES_HEADER
+from api.services.job_service import nlp_job_queue
+from api.core.settings import settings
+from api.database.database import async_engine, engine, read_engine
+from api.utils.dependencies import password_hasher
+from api.utils.metrics import METRICS_CONTENT_TYPE, SERVER_TIMING_HEADER, MetricsMiddleware, instrument_engine, registry
+from api.utils.profiling import ProfilingMiddleware, profiler
 import logging
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/login")
 
-app = FastAPI(openapi_url="/openapi.json", docs_url="/docs")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background NLP workers, resuming any jobs left over from the last run
+    await nlp_job_queue.start()
+    yield
+    await nlp_job_queue.stop()
+    password_hasher.shutdown()
+    profiler.sampler.stop()
+
+app = FastAPI(openapi_url="/openapi.json", docs_url="/docs", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,8 +37,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, DUPLICATES_HEADER, "ETag", SERVER_TIMING_HEADER],
 )
 
+if settings.PROFILING_ENABLED:
+    # When disabled, nothing is installed and requests pay nothing for it
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+    profiler.record_statements(engine)
+    profiler.record_statements(async_engine.sync_engine)
+    if read_engine is not async_engine:
+        profiler.record_statements(read_engine.sync_engine)
+
+if settings.METRICS_ENABLED:
+    # Added last, so it is the outermost middleware and times everything else
+    app.add_middleware(MetricsMiddleware)
+    instrument_engine(engine)
+    instrument_engine(async_engine.sync_engine)
+    # Without a separate read database, GET endpoints share the primary engine
+    if read_engine is not async_engine:
+        instrument_engine(read_engine.sync_engine)
+
 # Custom OpenAPI schema to include bearer token
 def custom_openapi():
     if app.openapi_schema:
@@ -52,6 +89,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     return JSONResponse(
         status_code=exc.status_code,
         content={"error": exc.detail, "type": "HTTPException"},
+        headers=exc.headers,
     )
 
 @app.exception_handler(RequestValidationError)
@@ -71,7 +109,15 @@ async def generic_exception_handler(request: Request, exc: Exception):
 
 app.include_router(user_router)
 app.include_router(todo_router)
+if settings.PROFILING_ENABLED:
+    app.include_router(profile_router)
 
 @app.get("/")
 def read_root():
     return {"message": "API is running"}
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def read_metrics():
+        """Request, database and LLM metrics of this worker, in the Prometheus text format."""
+        return Response(registry.render(), media_type=METRICS_CONTENT_TYPE)
@@ -0,0 +1,52 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import asyncio
+from types import SimpleNamespace
+from api.utils.cache import MemoryCache, SQLiteCache, content_hash
+from api.services import todo_service
+
+def test_content_hash_is_order_independent():
+    assert content_hash({"a": 1, "b": [1, 2]}) == content_hash({"b": [1, 2], "a": 1})
+    assert content_hash({"a": 1}) != content_hash({"a": 2})
+
+def test_memory_cache_lru_and_ttl():
+    cache = MemoryCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts "b", the least recently used
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+
+    expired = MemoryCache(ttl=0)
+    expired.set("a", 1)
+    assert expired.get("a") is None
+
+def test_sqlite_cache_persists(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = SQLiteCache(path, maxsize=2, ttl=60)
+    cache.set("a", {"suggestions": ["x"]})
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)  # evicts "b"
+    reopened = SQLiteCache(path, maxsize=2, ttl=60)
+    assert reopened.get("a") == {"suggestions": ["x"]}
+    assert reopened.get("b") is None
+
+def test_generate_ai_suggestions_is_cached(monkeypatch):
+    calls = []
+    async def complete(**request):
+        calls.append(request)
+        return '{"suggestions": ["Do less"]}'
+    monkeypatch.setattr(todo_service, "llm", SimpleNamespace(complete=complete))
+    monkeypatch.setattr(todo_service, "suggestion_cache", MemoryCache())
+
+    data = {"completion_rate": 50.0, "overdue_tasks": 1, "completed_tasks": 2}
+    assert asyncio.run(todo_service.generate_ai_suggestions(data)) == {"suggestions": ["Do less"]}
+    assert asyncio.run(todo_service.generate_ai_suggestions(dict(data))) == {"suggestions": ["Do less"]}
+    assert len(calls) == 1
+    asyncio.run(todo_service.generate_ai_suggestions({**data, "overdue_tasks": 2}))
+    assert len(calls) == 2
@@ -0,0 +1,132 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+import pytest
+from openai import AsyncOpenAI
+from api.services import todo_service
+from api.services.llm_gateway import CircuitBreaker, LLMGateway, LLMUnavailableError
+from api.utils.batching import MicroBatcher
+
+class FakeResponsesHandler(BaseHTTPRequestHandler):
+    """Minimal stand-in for the Responses API, driven by the server's `mode`."""
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests += 1
+        if self.server.mode == "slow":
+            time.sleep(0.5)
+        if self.server.mode == "error":
+            self.send_response(500)
+            self.end_headers()
+            return
+        body = json.dumps({
+            "id": "resp_1", "object": "response", "created_at": 0, "model": "gpt-4o", "status": "completed",
+            "output": [{"type": "message", "id": "msg_1", "status": "completed", "role": "assistant",
+                        "content": [{"type": "output_text", "text": " Expanded todo ", "annotations": []}]}],
+            "parallel_tool_calls": False, "tool_choice": "auto", "tools": [],
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def fake_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeResponsesHandler)
+    server.mode, server.requests = "ok", 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+def _gateway(server, **kwargs):
+    client = AsyncOpenAI(api_key="sk-test", base_url=f"http://127.0.0.1:{server.server_port}/v1", max_retries=0)
+    return LLMGateway(client, **kwargs)
+
+def test_gateway_returns_output_text(fake_server):
+    gateway = _gateway(fake_server)
+    assert asyncio.run(gateway.complete(instructions="Expand", input="todo")) == "Expanded todo"
+
+def test_gateway_enforces_deadline(fake_server):
+    fake_server.mode = "slow"
+    gateway = _gateway(fake_server, timeout=0.1)
+    start = time.monotonic()
+    with pytest.raises(LLMUnavailableError):
+        asyncio.run(gateway.complete(instructions="Expand", input="todo"))
+    assert time.monotonic() - start < 0.4
+
+def test_circuit_breaker_fails_fast(fake_server):
+    fake_server.mode = "error"
+    gateway = _gateway(fake_server, breaker=CircuitBreaker(error_rate=0.5, min_calls=2, cooldown=60))
+
+    async def calls():
+        for _ in range(5):
+            with pytest.raises(LLMUnavailableError):
+                await gateway.complete(instructions="Expand", input="todo")
+    asyncio.run(calls())
+    assert gateway.breaker.state == "open"
+    assert fake_server.requests == 2
+
+def test_circuit_breaker_half_open_probe():
+    breaker = CircuitBreaker(error_rate=0.5, min_calls=1, cooldown=0)
+    breaker.record(False)
+    assert breaker.state == "half_open"
+    assert breaker.allow() and not breaker.allow()
+    breaker.record(True)
+    assert breaker.state == "closed"
+
+def test_cancelled_probe_frees_the_breaker(fake_server):
+    fake_server.mode = "slow"
+    breaker = CircuitBreaker(error_rate=0.5, min_calls=1, cooldown=0)
+    breaker.record(False)
+    gateway = _gateway(fake_server, breaker=breaker)
+
+    async def cancel_probe():
+        probe = asyncio.create_task(gateway.complete(instructions="Expand", input="todo"))
+        await asyncio.sleep(0.1)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+    asyncio.run(cancel_probe())
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+def test_expand_description_falls_back(fake_server, monkeypatch):
+    fake_server.mode = "error"
+    monkeypatch.setattr(todo_service, "llm", _gateway(fake_server))
+    assert asyncio.run(todo_service.expand_description("buy milk")) == "buy milk"
+
+def test_expand_description_batches_concurrent_calls(monkeypatch):
+    calls = []
+    async def complete(instructions, input, **kwargs):
+        calls.append(input)
+        return json.dumps({"expansions": [f"Expanded: {d}" for d in json.loads(input)]})
+    monkeypatch.setattr(todo_service, "llm", SimpleNamespace(complete=complete))
+    batcher = MicroBatcher(todo_service.expand_descriptions, window=0.05, max_size=4)
+    monkeypatch.setattr(todo_service, "expansion_batcher", batcher)
+
+    async def expand_all():
+        return await asyncio.gather(*(todo_service.expand_description(f"todo {i}") for i in range(6)))
+    assert asyncio.run(expand_all()) == [f"Expanded: todo {i}" for i in range(6)]
+    # One full batch of 4 as soon as it filled up, then the remaining 2 after the window
+    assert len(calls) == 2
+    assert batcher.stats() == {"batches": 2, "items": 6, "fill_ratio": 0.75}
+
+def test_expand_description_batch_falls_back_on_malformed_output(monkeypatch):
+    async def complete(instructions, input, **kwargs):
+        return json.dumps({"expansions": ["only one"]})
+    monkeypatch.setattr(todo_service, "llm", SimpleNamespace(complete=complete))
+    monkeypatch.setattr(todo_service, "expansion_batcher", MicroBatcher(todo_service.expand_descriptions, window=0.05))
+
+    async def expand_all():
+        return await asyncio.gather(todo_service.expand_description("first"), todo_service.expand_description("second"))
+    assert asyncio.run(expand_all()) == ["first", "second"]
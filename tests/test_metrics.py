@@ -0,0 +1,56 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import re
+from fastapi.testclient import TestClient
+from api.utils.metrics import Histogram
+from main import app
+
+client = TestClient(app)
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("latency_seconds", "Latency.", ["route"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value, route="/x")
+    assert histogram.render().splitlines() == [
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/x",le="0.1"} 2',
+        'latency_seconds_bucket{route="/x",le="1.0"} 3',
+        'latency_seconds_bucket{route="/x",le="+Inf"} 4',
+        'latency_seconds_sum{route="/x"} 2.65',
+        'latency_seconds_count{route="/x"} 4',
+    ]
+
+def test_server_timing_and_metrics():
+    response = client.get("/todos/", params={"limit": 5})
+    assert response.status_code == 200
+    timing = response.headers["Server-Timing"]
+    queries = int(re.search(r'db;dur=[\d.]+;desc="(\d+) queries"', timing).group(1))
+    assert queries >= 1
+    assert "total;dur=" in timing
+
+    metrics = client.get("/metrics")
+    assert metrics.status_code == 200
+    assert metrics.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = metrics.text
+    # Routes are labelled by template, not by the concrete path
+    assert re.search(r'^http_requests_total\{method="GET",route="/todos/",status="200"\} \d', text, re.M)
+    client.get("/todos/missing-id")
+    assert 'route="/todos/{todo_id}"' in client.get("/metrics").text
+    assert re.search(r'^db_queries_per_request_count\{method="GET",route="/todos/"\} \d', text, re.M)
+    assert "# TYPE http_requests_in_flight gauge" in text
+
+def test_cache_metrics():
+    text = client.get("/metrics").text
+    assert "# TYPE cache_hits_total counter" in text
+    for cache in ("auth_tokens", "auth_users", "suggestions"):
+        assert re.search(rf'^cache_misses_total\{{cache="{cache}"\}} \d', text, re.M)
+        assert re.search(rf'^cache_hit_ratio\{{cache="{cache}"\}} [\d.]+$', text, re.M)
+
+def test_batcher_metrics():
+    text = client.get("/metrics").text
+    assert "# TYPE batcher_fill_ratio gauge" in text
+    assert re.search(r'^batcher_batches_total\{batcher="llm_expansions"\} \d', text, re.M)
+    assert re.search(r'^batcher_items_total\{batcher="llm_expansions"\} \d', text, re.M)
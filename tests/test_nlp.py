@@ -0,0 +1,19 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+import spacy
+from api.core.settings import settings
+from api.services import nlp_service
+from api.services.todo_service import generate_title_from_description
+
+def test_nlp_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "NLP_ENABLED", False)
+    assert nlp_service.get_nlp() is None
+    assert nlp_service.extract_title("Finish the quarterly report by Friday") is None
+    assert generate_title_from_description("Finish the quarterly report. Then send it.") == "Finish the quarterly report"
+
+@pytest.mark.skipif(not spacy.util.is_package(settings.NLP_MODEL), reason="spaCy model not installed")
+def test_extract_title_from_noun_chunks():
+    assert nlp_service.extract_title("I need to finish the quarterly report by Friday.") == "Finish the quarterly report"
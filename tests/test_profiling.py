@@ -0,0 +1,56 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import asyncio
+import pstats
+import time
+from api.utils.profiling import Profiler, ProfilingMiddleware, to_collapsed, to_pstats
+
+def _busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+
+def _profile(profiler, app, path="/slow"):
+    async def send(message):
+        pass
+    asyncio.run(ProfilingMiddleware(app, profiler)({"type": "http", "method": "GET", "path": path}, None, send))
+
+def test_slow_requests_are_captured(tmp_path):
+    profiler = Profiler(slow_ms=50, max_captures=2, interval=0.001)
+
+    async def app(scope, receive, send):
+        if scope["path"] == "/slow":
+            _busy(0.1)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+
+    try:
+        _profile(profiler, app, "/fast")
+        assert len(profiler.captures) == 0
+        _profile(profiler, app)
+    finally:
+        profiler.sampler.stop()
+    capture = profiler.captures[-1]
+    assert capture.reason == "slow" and capture.status == 200 and capture.duration_ms >= 100
+    assert "_busy (" in to_collapsed(capture.samples)
+
+    path = tmp_path / "profile.prof"
+    path.write_bytes(to_pstats(capture.samples))
+    stats = pstats.Stats(str(path)).stats
+    busy = next(value for key, value in stats.items() if key[2] == "_busy")
+    # Own time of the busy loop, within the sampler's resolution
+    assert 0.05 < busy[2] < 0.2
+
+def test_capture_ring_is_bounded():
+    profiler = Profiler(sample_rate=1.0, slow_ms=10_000, max_captures=2)
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 204, "headers": []})
+
+    try:
+        for _ in range(3):
+            _profile(profiler, app, "/fast")
+    finally:
+        profiler.sampler.stop()
+    assert [capture.reason for capture in profiler.captures] == ["sampled", "sampled"]
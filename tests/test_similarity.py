@@ -0,0 +1,63 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+from fastapi.testclient import TestClient
+from main import app
+from api.services import embedding_service
+from api.services.embedding_service import DUPLICATES_HEADER, HASH_DIM, hash_embed
+from api.utils.vectors import VectorIndex, from_blobs, to_blob
+
+client = TestClient(app)
+
+def _auth_headers():
+    import uuid
+    unique = str(uuid.uuid4())[:8]
+    user_data = {
+        "username": f"simuser_{unique}",
+        "email": f"sim_{unique}@example.com",
+        "password": "testpassword",
+        "name": "Similar User"
+    }
+    client.post("/users/", json=user_data)
+    token = client.post("/users/login", json={"username": user_data["username"], "password": user_data["password"]}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def test_vector_index_search_add_remove():
+    index = VectorIndex(3, capacity=1)
+    index.add(["a", "b", "c"], np.array([[1, 0, 0], [0.9, 0.1, 0], [0, 1, 0]]))
+    [matches] = index.search(np.array([1, 0, 0]), 2, exclude=["a"])
+    assert [id for id, _ in matches] == ["b", "c"]
+    index.remove(["a"])
+    assert len(index) == 2 and "a" not in index
+    index.add(["b"], np.array([0, 0, 2]))  # replaces b's vector
+    results = index.search(np.array([[0, 0, 1], [0, 1, 0]]), 1)
+    assert results[0][0][0] == "b" and abs(results[0][0][1] - 1.0) < 1e-6
+    assert results[1][0][0] == "c"
+    assert np.array_equal(from_blobs([to_blob(np.ones(3)), to_blob(np.zeros(3))], 3), [[1, 1, 1], [0, 0, 0]])
+
+def test_hash_embedding_is_stable():
+    assert np.array_equal(hash_embed("Buy milk"), hash_embed("buy MILK"))
+    assert not np.array_equal(hash_embed("Buy milk"), hash_embed("File taxes"))
+
+def test_similar_todos_and_duplicate_warning(monkeypatch):
+    # Use the hashing embedder whatever spaCy model is installed
+    monkeypatch.setattr(embedding_service, "_embedder", (f"hash:{HASH_DIM}", HASH_DIM))
+    headers = _auth_headers()
+    milk = client.post("/todos/", json={"title": "Buy oat milk", "content": "Buy oat milk at the corner store"}, headers=headers).json()
+    taxes = client.post("/todos/", json={"title": "File taxes", "content": "Send the tax return to the accountant"}, headers=headers).json()
+    client.post("/todos/", json={"title": "Buy oat milk", "content": "Buy oat milk at the corner store"}, headers=_auth_headers())
+
+    response = client.post("/todos/", params={"check_duplicates": True}, json={"title": "Buy oat milk", "content": "Buy oat milk at the store on the corner"}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers[DUPLICATES_HEADER] == milk["id"]
+    duplicate = response.json()
+
+    similar = client.get(f"/todos/{duplicate['id']}/similar", headers=headers).json()
+    assert [match["todo"]["id"] for match in similar] == [milk["id"], taxes["id"]]
+    assert similar[0]["score"] > similar[1]["score"]
+
+    client.delete(f"/todos/{milk['id']}", headers=headers)
+    assert [match["todo"]["id"] for match in client.get(f"/todos/{duplicate['id']}/similar", headers=headers).json()] == [taxes["id"]]
+    assert client.get(f"/todos/{taxes['id']}/similar", headers=_auth_headers()).status_code == 404
@@ -22,3 +22,455 @@ def test_get_todos():
     response = client.get("/todos/")
     assert response.status_code == 200
     assert isinstance(response.json(), list)
+
+def _auth_headers():
+    import uuid
+    unique = str(uuid.uuid4())[:8]
+    user_data = {
+        "username": f"todouser_{unique}",
+        "email": f"todo_{unique}@example.com",
+        "password": "testpassword",
+        "name": "Todo User"
+    }
+    client.post("/users/", json=user_data)
+    response = client.post("/users/login", json={"username": user_data["username"], "password": user_data["password"]})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def test_todo_crud():
+    headers = _auth_headers()
+    response = client.post("/todos/", json={"title": "Write report", "content": "Write the quarterly report"}, headers=headers)
+    assert response.status_code == 200
+    todo = response.json()
+    assert todo["completed"] is False
+
+    response = client.get(f"/todos/{todo['id']}")
+    assert response.status_code == 200
+    assert response.json()["title"] == "Write report"
+
+    response = client.put(f"/todos/{todo['id']}", json={"completed": True}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["completed"] is True
+
+    response = client.delete(f"/todos/{todo['id']}", headers=headers)
+    assert response.status_code == 200
+    assert client.get(f"/todos/{todo['id']}").status_code == 404
+
+def test_create_todo_defaults_due_date():
+    headers = _auth_headers()
+    response = client.post("/todos/", json={"title": "Someday", "content": "No due date given"}, headers=headers)
+    assert response.status_code == 200
+    todo = response.json()
+    assert todo["due_date"] is not None
+    assert client.get(f"/todos/{todo['id']}").json()["due_date"] == todo["due_date"]
+
+def test_get_todos_cursor_pagination():
+    headers = _auth_headers()
+    for i in range(3):
+        client.post("/todos/", json={"title": f"Page {i}", "content": "Cursor pagination todo"}, headers=headers)
+    expected = [todo["id"] for todo in client.get("/todos/", params={"limit": 10000}).json()]
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/todos/", params=params)
+        assert response.status_code == 200
+        seen += [todo["id"] for todo in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert seen == expected
+
+def test_get_todos_invalid_cursor():
+    response = client.get("/todos/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+async def _no_suggestions(data):
+    return {"suggestions": []}
+
+def test_productivity_is_scoped_to_current_user(monkeypatch):
+    monkeypatch.setattr("api.services.todo_service.generate_ai_suggestions", _no_suggestions)
+    headers = _auth_headers()
+    done = client.post("/todos/", json={"title": "Done", "content": "Already finished", "priority": 1}, headers=headers).json()
+    client.put(f"/todos/{done['id']}", json={"completed": True}, headers=headers)
+    client.post("/todos/", json={"title": "Late", "content": "Past its due date", "priority": 2, "due_date": "2000-01-01T00:00:00"}, headers=headers)
+    client.post("/todos/", json={"title": "Later", "content": "Due in the future", "priority": 2, "due_date": "2999-01-01T00:00:00"}, headers=headers)
+
+    response = client.get("/todos/productivity/", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["total_tasks"], data["completed_tasks"], data["overdue_tasks"], data["pending_tasks"]) == (3, 1, 1, 2)
+    assert data["by_priority"] == [
+        {"priority": 1, "total": 1, "completed": 1, "overdue": 0},
+        {"priority": 2, "total": 2, "completed": 0, "overdue": 1},
+    ]
+    assert sum(entry["completed_count"] for entry in data["completion_history"]) == 1
+
+def test_user_stats_match_rebuild(monkeypatch):
+    import asyncio
+    from api.database.database import AsyncSessionLocal
+    from api.services.stats_service import rebuild_user_stats
+
+    monkeypatch.setattr("api.services.todo_service.generate_ai_suggestions", _no_suggestions)
+    headers = _auth_headers()
+    first = client.post("/todos/", json={"title": "One", "content": "First counted todo", "priority": 3}, headers=headers).json()
+    second = client.post("/todos/", json={"title": "Two", "content": "Second counted todo"}, headers=headers).json()
+    client.put(f"/todos/{first['id']}", json={"completed": True, "priority": 1}, headers=headers)
+    client.delete(f"/todos/{second['id']}", headers=headers)
+
+    data = client.get("/todos/productivity/", headers=headers).json()
+    assert (data["total_tasks"], data["completed_tasks"]) == (1, 1)
+
+    async def drift():
+        async with AsyncSessionLocal() as db:
+            return await rebuild_user_stats(db, user_id=first["user_id"], dry_run=True)
+    assert asyncio.run(drift()) == {}
+
+def test_nlp_background_job(monkeypatch):
+    import time
+    from types import SimpleNamespace
+
+    async def complete(**request):
+        return "Buy oat milk at the corner store. Put it in the fridge."
+    monkeypatch.setattr("api.services.todo_service.llm", SimpleNamespace(complete=complete))
+    # Keep the first-sentence title rule regardless of whether a spaCy model is installed
+    monkeypatch.setattr("api.core.settings.settings.NLP_ENABLED", False)
+    headers = _auth_headers()
+    # Entering the client runs the lifespan, which starts the job workers
+    with TestClient(app) as background_client:
+        response = background_client.post("/todos/nlp/", params={"description": "buy milk", "background": True}, headers=headers)
+        assert response.status_code == 202
+        job = response.json()
+        assert background_client.get(f"/todos/{job['todo_id']}").json()["content"] == "buy milk"
+
+        for _ in range(50):
+            job = background_client.get(f"/todos/nlp/jobs/{job['id']}", headers=headers).json()
+            if job["status"] == "done":
+                break
+            time.sleep(0.05)
+        assert job["status"] == "done"
+        todo = background_client.get(f"/todos/{job['todo_id']}").json()
+        assert todo["content"] == "Buy oat milk at the corner store. Put it in the fridge."
+        assert todo["title"] == "Buy oat milk at the corner store"
+
+def test_nlp_job_claimed_once(monkeypatch):
+    import asyncio
+    from datetime import datetime, timedelta, timezone
+    from sqlalchemy import update
+    from api.database.database import AsyncSessionLocal
+    from api.models.model import Job
+    from types import SimpleNamespace
+    from api.services import job_service
+
+    calls = []
+    async def expand(description):
+        calls.append(description)
+        await asyncio.sleep(0.05)
+        return description
+    monkeypatch.setattr(job_service, "expansion_batcher", SimpleNamespace(submit=expand))
+    headers = _auth_headers()
+    todo = client.post("/todos/", json={"title": "Milk", "content": "buy milk"}, headers=headers).json()
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            job = await job_service.create_expand_job(db, todo["id"], todo["user_id"], "buy milk")
+        # Two workers, e.g. in two processes, picked up the same job id
+        await asyncio.gather(job_service.process_expand_job(job.id), job_service.process_expand_job(job.id))
+        async with AsyncSessionLocal() as db:
+            done = await db.get(Job, job.id)
+            outcome = (done.status, done.attempts)
+            # A running job is left alone until its lease runs out
+            await db.execute(update(Job).filter(Job.id == job.id).values(status="running", updated_at=datetime.now(timezone.utc)))
+            await db.commit()
+        await job_service.process_expand_job(job.id)
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(Job).filter(Job.id == job.id).values(updated_at=datetime.now(timezone.utc) - timedelta(hours=1)))
+            await db.commit()
+        await job_service.process_expand_job(job.id)
+        return outcome
+    assert asyncio.run(run()) == ("done", 1)
+    assert len(calls) == 2
+
+def test_nlp_job_keeps_concurrent_edit(monkeypatch):
+    import asyncio
+    from types import SimpleNamespace
+    from api.database.database import AsyncSessionLocal
+    from api.models.model import Job
+    from api.schemas.todo import TodoUpdate
+    from api.services import job_service
+    from api.services.todo_service import get_todo, update_todo
+
+    headers = _auth_headers()
+    todo = client.post("/todos/", json={"title": "Milk", "content": "buy milk"}, headers=headers).json()
+
+    async def expand(description):
+        # The user renames the todo while the LLM call is in flight
+        async with AsyncSessionLocal() as db:
+            await update_todo(db, todo["id"], TodoUpdate(title="Oat milk"), todo["user_id"])
+        return "Buy oat milk at the corner store."
+    monkeypatch.setattr(job_service, "expansion_batcher", SimpleNamespace(submit=expand))
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            job = await job_service.create_expand_job(db, todo["id"], todo["user_id"], "buy milk")
+        await job_service.process_expand_job(job.id)
+        async with AsyncSessionLocal() as db:
+            stored = await get_todo(db, todo["id"])
+            return (await db.get(Job, job.id)).status, stored.title, stored.content
+    assert asyncio.run(run()) == ("done", "Oat milk", "buy milk")
+
+def test_nlp_job_retries_unavailable_llm(monkeypatch):
+    import asyncio
+    from types import SimpleNamespace
+    from api.database.database import AsyncSessionLocal
+    from api.models.model import Job
+    from api.services import job_service
+    from api.services.llm_gateway import LLMUnavailableError
+
+    async def expand(description):
+        raise LLMUnavailableError("Circuit open")
+    monkeypatch.setattr(job_service, "expansion_batcher", SimpleNamespace(submit=expand))
+    monkeypatch.setattr("api.core.settings.settings.NLP_JOB_MAX_ATTEMPTS", 2)
+    headers = _auth_headers()
+    todo = client.post("/todos/", json={"title": "Milk", "content": "buy milk"}, headers=headers).json()
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            job = await job_service.create_expand_job(db, todo["id"], todo["user_id"], "buy milk")
+        outcomes = []
+        for _ in range(2):
+            await job_service.process_expand_job(job.id)
+            async with AsyncSessionLocal() as db:
+                stored = await db.get(Job, job.id)
+                outcomes.append((stored.status, stored.attempts, stored.error))
+        return outcomes
+    assert asyncio.run(run()) == [("pending", 1, "Circuit open"), ("failed", 2, "Circuit open")]
+    assert client.get(f"/todos/{todo['id']}").json()["content"] == "buy milk"
+
+def test_todo_batch():
+    import asyncio
+    from api.database.database import AsyncSessionLocal
+    from api.services.stats_service import rebuild_user_stats
+
+    headers = _auth_headers()
+    other = client.post("/todos/", json={"title": "Not mine", "content": "Owned by another user"}, headers=_auth_headers()).json()
+    existing = client.post("/todos/", json={"title": "Existing", "content": "Already stored", "priority": 2}, headers=headers).json()
+    doomed = client.post("/todos/", json={"title": "Doomed", "content": "Deleted by the batch"}, headers=headers).json()
+
+    response = client.post("/todos/batch", json={"operations": [
+        {"op": "create", "todo": {"title": "New", "content": "Created by the batch", "priority": 1}},
+        {"op": "update", "id": existing["id"], "todo": {"completed": True}},
+        {"op": "update", "id": existing["id"], "todo": {"title": "Renamed"}},
+        {"op": "delete", "id": doomed["id"]},
+        {"op": "delete", "id": doomed["id"]},
+        {"op": "update", "id": other["id"], "todo": {"title": "Stolen"}},
+    ]}, headers=headers)
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == [201, 200, 200, 200, 404, 404]
+    assert results[0]["todo"]["title"] == "New" and results[0]["todo"]["user_id"] == existing["user_id"]
+    assert results[2]["todo"]["title"] == "Renamed" and results[2]["todo"]["completed"] is True
+    assert client.get(f"/todos/{doomed['id']}").status_code == 404
+    assert client.get(f"/todos/{other['id']}").json()["title"] == "Not mine"
+
+    async def drift():
+        async with AsyncSessionLocal() as db:
+            return await rebuild_user_stats(db, user_id=existing["user_id"], dry_run=True)
+    assert asyncio.run(drift()) == {}
+
+def test_todo_batch_create_matches_single_create():
+    from datetime import datetime
+
+    headers = _auth_headers()
+    single = client.post("/todos/", json={"title": "Single", "content": "Created on its own"}, headers=headers).json()
+    response = client.post("/todos/batch", json={"operations": [
+        {"op": "create", "todo": {"title": "Batched", "content": "Created by the batch"}},
+        {"op": "create", "todo": {"title": "Dated", "content": "Created with a due date", "due_date": "2030-01-01T09:00:00"}},
+    ]}, headers=headers)
+    batched, dated = [result["todo"] for result in response.json()["results"]]
+
+    for field in ("completed", "priority", "user_id"):
+        assert batched[field] == single[field]
+    assert batched["due_date"] is not None and single["due_date"] is not None
+    gap = datetime.fromisoformat(batched["due_date"]) - datetime.fromisoformat(single["due_date"])
+    assert abs(gap.total_seconds()) < 60
+    assert dated["due_date"] == "2030-01-01T09:00:00"
+    assert client.get(f"/todos/{batched['id']}").json()["due_date"] == batched["due_date"]
+
+def test_update_and_delete_check_ownership():
+    owner = _auth_headers()
+    todo = client.post("/todos/", json={"title": "Mine", "content": "Only the owner may change this"}, headers=owner).json()
+    intruder = _auth_headers()
+    assert client.put(f"/todos/{todo['id']}", json={"title": "Taken"}, headers=intruder).status_code == 404
+    assert client.delete(f"/todos/{todo['id']}", headers=intruder).status_code == 404
+
+    updated = client.put(f"/todos/{todo['id']}", json={"title": "Still mine"}, headers=owner).json()
+    assert updated["title"] == "Still mine" and updated["content"] == todo["content"]
+    assert client.delete(f"/todos/{todo['id']}", headers=owner).status_code == 200
+
+def test_todo_etags():
+    headers = _auth_headers()
+    todo = client.post("/todos/", json={"title": "Cache me", "content": "Served from the client's cache"}, headers=headers).json()
+
+    response = client.get(f"/todos/{todo['id']}")
+    etag = response.headers["ETag"]
+    response = client.get(f"/todos/{todo['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 304 and response.content == b""
+
+    updated = client.put(f"/todos/{todo['id']}", json={"completed": True}, headers={**headers, "If-Match": etag})
+    assert updated.status_code == 200
+    assert updated.headers["ETag"] != etag
+    assert client.get(f"/todos/{todo['id']}", headers={"If-None-Match": etag}).status_code == 200
+
+    # The old ETag is stale now, so a second writer holding it is refused
+    stale = client.put(f"/todos/{todo['id']}", json={"title": "Lost update"}, headers={**headers, "If-Match": etag})
+    assert stale.status_code == 412
+    assert client.get(f"/todos/{todo['id']}").json()["title"] == "Cache me"
+
+    params = {"owner": "me"}
+    page = client.get("/todos/", params=params, headers=headers)
+    assert client.get("/todos/", params=params, headers={**headers, "If-None-Match": page.headers["ETag"]}).status_code == 304
+    client.put(f"/todos/{todo['id']}", json={"completed": False}, headers=headers)
+    assert client.get("/todos/", params=params, headers={**headers, "If-None-Match": page.headers["ETag"]}).status_code == 200
+
+def test_todo_change_feed():
+    headers = _auth_headers()
+    first = client.post("/todos/", json={"title": "Sync me", "content": "Shows up in the change feed"}, headers=headers).json()
+    second = client.post("/todos/", json={"title": "Delete me", "content": "Also in the change feed"}, headers=headers).json()
+    changes = client.get("/todos/changes", headers=headers).json()
+    assert [(change["op"], change["todo_id"]) for change in changes] == [("create", first["id"]), ("create", second["id"])]
+    since = changes[-1]["seq"]
+
+    client.put(f"/todos/{first['id']}", json={"completed": True}, headers=headers)
+    client.delete(f"/todos/{second['id']}", headers=headers)
+    changes = client.get("/todos/changes", params={"since": since}, headers=headers).json()
+    assert [(change["op"], change["todo_id"]) for change in changes] == [("update", first["id"]), ("delete", second["id"])]
+    assert changes[0]["todo"]["completed"] is True and changes[1]["todo"] is None
+    assert changes[0]["seq"] < changes[1]["seq"]
+
+    # Nothing new: a long-poll times out with an empty list
+    assert client.get("/todos/changes", params={"since": changes[-1]["seq"], "wait": 0.1}, headers=headers).json() == []
+
+def test_todo_change_stream():
+    import asyncio
+    import json
+    from api.services.change_service import stream_changes
+    headers = _auth_headers()
+    todo = client.post("/todos/", json={"title": "Stream me", "content": "Sent as a server-sent event"}, headers=headers).json()
+
+    async def first_event():
+        stream = stream_changes(todo["user_id"], 0, heartbeat=0.1)
+        try:
+            return await stream.__anext__()
+        finally:
+            await stream.aclose()
+    event = asyncio.run(first_event())
+    lines = dict(line.split(": ", 1) for line in event.strip().split("\n"))
+    data = json.loads(lines["data"])
+    assert data["op"] == "create" and data["todo"]["id"] == todo["id"]
+    assert lines["id"] == str(data["seq"])
+
+def test_export_todos():
+    import csv
+    import io
+    import json
+    headers = _auth_headers()
+    created = [
+        client.post("/todos/", json={"title": f"Export {i}", "content": "Exported todo, with a comma", "priority": 1}, headers=headers).json()
+        for i in range(3)
+    ]
+
+    response = client.get("/todos/export", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == [todo["id"] for todo in created]
+
+    response = client.get("/todos/export", params={"format": "csv"}, headers=headers)
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["title"] for row in rows] == ["Export 0", "Export 1", "Export 2"]
+    assert rows[0]["content"] == "Exported todo, with a comma"
+
+    assert client.get("/todos/export", params={"format": "xml"}, headers=headers).status_code == 422
+
+def test_search_todos():
+    headers = _auth_headers()
+    title_match = client.post("/todos/", json={"title": "Quarterly report", "content": "Draft it by Friday"}, headers=headers).json()
+    content_match = client.post("/todos/", json={"title": "Finance", "content": "Send the quarterly numbers for the report"}, headers=headers).json()
+    client.post("/todos/", json={"title": "Groceries", "content": "Buy milk and eggs"}, headers=headers)
+    client.post("/todos/", json={"title": "Quarterly report", "content": "Someone else's todo"}, headers=_auth_headers())
+
+    response = client.get("/todos/search", params={"q": "quarterly REPORT"}, headers=headers)
+    assert response.status_code == 200
+    results = response.json()
+    assert [r["todo"]["id"] for r in results] == [title_match["id"], content_match["id"]]
+    assert results[0]["highlighted_title"] == "<mark>Quarterly</mark> <mark>report</mark>"
+    assert "<mark>quarterly</mark>" in results[1]["snippet"]
+
+    client.put(f"/todos/{content_match['id']}", json={"content": "Nothing to see here"}, headers=headers)
+    assert [r["todo"]["id"] for r in client.get("/todos/search", params={"q": "report"}, headers=headers).json()] == [title_match["id"]]
+    assert client.get("/todos/search", params={"q": '"unbalanced'}, headers=headers).status_code == 200
+
+    client.post("/todos/", json={"title": "<b>Report</b> & co", "content": "Plain"}, headers=headers)
+    [escaped] = client.get("/todos/search", params={"q": "co"}, headers=headers).json()
+    assert escaped["highlighted_title"] == "&lt;b&gt;Report&lt;/b&gt; &amp; <mark>co</mark>"
+
+def test_get_todos_filters_and_sort():
+    headers = _auth_headers()
+    low = client.post("/todos/", json={"title": "Low", "content": "Low priority todo", "priority": 3, "due_date": "2030-01-03T00:00:00"}, headers=headers).json()
+    high = client.post("/todos/", json={"title": "High", "content": "High priority todo", "priority": 1, "due_date": "2030-01-02T00:00:00"}, headers=headers).json()
+    done = client.post("/todos/", json={"title": "Done", "content": "Finished todo", "priority": 2, "due_date": "2030-01-01T00:00:00"}, headers=headers).json()
+    client.put(f"/todos/{done['id']}", json={"completed": True}, headers=headers)
+    client.post("/todos/", json={"title": "Other", "content": "Someone else's todo", "priority": 1}, headers=_auth_headers())
+
+    def ids(**params):
+        response = client.get("/todos/", params={"owner": "me", **params}, headers=headers)
+        assert response.status_code == 200
+        return [todo["id"] for todo in response.json()]
+
+    assert ids() == [low["id"], high["id"], done["id"]]
+    assert ids(sort="priority") == [high["id"], done["id"], low["id"]]
+    assert ids(sort="due_date") == [done["id"], high["id"], low["id"]]
+    assert ids(completed=False, priority=[1, 3], sort="priority") == [high["id"], low["id"]]
+    assert ids(due_after="2030-01-02T00:00:00", due_before="2030-01-03T00:00:00") == [high["id"]]
+    assert client.get("/todos/", params={"owner": "me"}).status_code == 401
+    assert client.get("/todos/", params={"sort": "priority", "cursor": "x"}).status_code == 400
+
+def _query_plan(engine, stmt) -> list:
+    """SQLite's EXPLAIN QUERY PLAN for a statement, with its parameters bound the way SQLAlchemy binds them."""
+    from sqlalchemy import event
+    captured = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        with engine.connect() as conn:
+            conn.execute(stmt).all()
+            statement, parameters = captured[-1]
+            return [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()]
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+def test_todo_filters_use_indexes():
+    import itertools
+    from datetime import datetime
+    from sqlalchemy import create_engine
+    from api.database.database import Base
+    from api.services.todo_service import TODO_SORTS, build_todo_query
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    options = itertools.product(
+        [None, "user"], [None, True], [None, [1, 2]], [None, datetime(2030, 1, 1)], [None, datetime(2020, 1, 1)], TODO_SORTS
+    )
+    for user_id, completed, priorities, due_before, due_after, sort in options:
+        stmt = build_todo_query(
+            user_id=user_id, completed=completed, priorities=priorities, due_before=due_before, due_after=due_after, sort=sort
+        ).limit(100)
+        plan = _query_plan(engine, stmt)
+        reads = [step for step in plan if "todos" in step]
+        if any(value is not None for value in (user_id, completed, priorities, due_before, due_after)):
+            # A filter must narrow the rows through an index, not scan all of one
+            assert reads and all(step.startswith("SEARCH todos USING") and "INDEX" in step for step in reads), (stmt, plan)
+        else:
+            assert reads and all("INDEX" in step for step in reads), (stmt, plan)
@@ -45,3 +45,115 @@ def test_login_user():
     data = response.json()
     assert "access_token" in data
     assert data["token_type"] == "bearer"
+
+def test_get_users_cursor_pagination():
+    expected = [user["id"] for user in client.get("/users/", params={"limit": 10000}).json()]
+    first = client.get("/users/", params={"limit": 1})
+    assert first.status_code == 200
+    cursor = first.headers["X-Next-Cursor"]
+    rest = client.get("/users/", params={"limit": 10000, "cursor": cursor}).json()
+    assert [user["id"] for user in first.json() + rest] == expected
+
+def test_user_etags():
+    import uuid
+    unique = str(uuid.uuid4())[:8]
+    user = client.post("/users/", json={
+        "username": f"etaguser_{unique}",
+        "email": f"etag_{unique}@example.com",
+        "password": "testpassword",
+        "name": "ETag User"
+    }).json()
+    etag = client.get(f"/users/{user['id']}").headers["ETag"]
+    assert client.get(f"/users/{user['id']}", headers={"If-None-Match": etag}).status_code == 304
+
+    client.put(f"/users/{user['id']}", json={"name": "Renamed"})
+    response = client.get(f"/users/{user['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["ETag"] != etag
+
+def test_current_user_cache_is_invalidated_on_delete():
+    import uuid
+    from api.utils.dependencies import auth_cache_stats
+    unique = str(uuid.uuid4())[:8]
+    user_data = {
+        "username": f"cacheuser_{unique}",
+        "email": f"cache_{unique}@example.com",
+        "password": "testpassword",
+        "name": "Cache User"
+    }
+    user = client.post("/users/", json=user_data).json()
+    token = client.post("/users/login", json={"username": user_data["username"], "password": user_data["password"]}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # Any authenticated route will do; the job does not exist, so a valid user gets a 404
+    assert client.get("/todos/nlp/jobs/missing", headers=headers).status_code == 404
+    before = auth_cache_stats()
+    assert client.get("/todos/nlp/jobs/missing", headers=headers).status_code == 404
+    after = auth_cache_stats()
+    assert after["tokens"]["hits"] == before["tokens"]["hits"] + 1
+    assert after["users"]["hits"] == before["users"]["hits"] + 1
+
+    assert client.delete(f"/users/{user['id']}").status_code == 200
+    assert client.get("/todos/nlp/jobs/missing", headers=headers).status_code == 401
+
+def test_password_hasher_limits_pending_operations():
+    import asyncio
+    from fastapi import HTTPException
+    from api.utils.passwords import PasswordHasher, hash_rounds
+    hasher = PasswordHasher(workers=0, max_pending=1, rounds=4)
+
+    async def run():
+        hashed = await hasher.hash("secret")
+        assert hash_rounds(hashed) == 4 and not hasher.needs_rehash(hashed)
+        assert await hasher.verify("secret", hashed)
+        assert not await hasher.verify("wrong", hashed)
+        first = asyncio.ensure_future(hasher.hash("secret"))
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as exc:
+            await hasher.hash("secret")
+        assert exc.value.status_code == 503
+        await first
+
+    asyncio.run(run())
+
+def test_full_password_queue_returns_retry_after(monkeypatch):
+    import uuid
+    from api.utils.dependencies import password_hasher
+    unique = str(uuid.uuid4())[:8]
+    user_data = {
+        "username": f"busy_{unique}",
+        "email": f"busy_{unique}@example.com",
+        "password": "testpassword",
+        "name": "Busy User"
+    }
+    # Every slot is taken by operations still in flight
+    monkeypatch.setattr(password_hasher, "pending", password_hasher.max_pending)
+    response = client.post("/users/", json=user_data)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+def test_login_rehashes_when_cost_factor_changes(monkeypatch):
+    import asyncio
+    import uuid
+    from api.database.database import AsyncSessionLocal
+    from api.services.user_service import get_user
+    from api.utils.dependencies import password_hasher
+    from api.utils.passwords import hash_rounds
+    unique = str(uuid.uuid4())[:8]
+    user_data = {
+        "username": f"rehash_{unique}",
+        "email": f"rehash_{unique}@example.com",
+        "password": "testpassword",
+        "name": "Rehash User"
+    }
+    monkeypatch.setattr(password_hasher, "rounds", 4)
+    user = client.post("/users/", json=user_data).json()
+
+    async def stored_rounds():
+        async with AsyncSessionLocal() as db:
+            return hash_rounds((await get_user(db, user["id"])).password)
+
+    assert asyncio.run(stored_rounds()) == 4
+    monkeypatch.setattr(password_hasher, "rounds", 5)
+    login = {"username": user_data["username"], "password": user_data["password"]}
+    assert client.post("/users/login", json=login).status_code == 200
+    assert asyncio.run(stored_rounds()) == 5